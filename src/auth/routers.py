@@ -1,19 +1,38 @@
 from typing import Any
+from uuid import uuid7
 
 from fastapi import APIRouter, HTTPException, Request, Response, status
+from fastapi.exceptions import RequestValidationError
 from sqlalchemy.orm import load_only
 from sqlmodel import or_, select
 
-from src.config.auth import auth_dep, form_data, pa, to
+from src.config.auth import auth_dep, claims_dep, form_data, pa, to
 from src.config.db import session_dep
+from src.config.limits import limit_by_ip
+from src.config.revocation import revocations
 from src.users.models import User
 from src.users.schemas import UserCreate, UserRead
 
 auth_router = APIRouter(prefix="/api/v1/auth", tags=["auth"])
 
 
-@auth_router.post("/signup", response_model=UserRead)
+@auth_router.post(
+    "/signup", response_model=UserRead, dependencies=[limit_by_ip("auth")]
+)
 async def signup(payload: UserCreate, session: session_dep) -> UserRead:
+    suggestions = await pa.check_strength(payload.password.get_secret_value())
+
+    if suggestions is not None:
+        raise RequestValidationError(
+            [
+                {
+                    "type": "value_error",
+                    "loc": ("body", "password"),
+                    "msg": f"Value error, {suggestions}",
+                }
+            ]
+        )
+
     statement = select(
         select(User)
         .where(
@@ -31,7 +50,7 @@ async def signup(payload: UserCreate, session: session_dep) -> UserRead:
     row = User(
         email=payload.email,
         username=payload.username,
-        hashed_password=pa.hash_password(payload.password.get_secret_value()),
+        hashed_password=await pa.hash_password(payload.password.get_secret_value()),
     )
     session.add(row)
     await session.commit()
@@ -39,7 +58,7 @@ async def signup(payload: UserCreate, session: session_dep) -> UserRead:
     return row  # ty: ignore
 
 
-@auth_router.post("/signin")
+@auth_router.post("/signin", dependencies=[limit_by_ip("auth")])
 async def signin(
     payload: form_data, session: session_dep, response: Response
 ) -> dict[str, str]:
@@ -54,11 +73,16 @@ async def signin(
     if not row:
         raise HTTPException(status.HTTP_401_UNAUTHORIZED)
 
-    if not pa.verify_password(row.hashed_password, payload.password):
+    if not await pa.verify_password(row.hashed_password, payload.password):
         raise HTTPException(status.HTTP_401_UNAUTHORIZED)
 
-    access_token = to.encode_token(row.id, "access_token")
-    refresh_token = to.encode_token(row.id, "refresh_token")
+    if pa.needs_rehash(row.hashed_password):
+        row.hashed_password = await pa.hash_password(payload.password)
+        await session.commit()
+
+    family = str(uuid7())
+    access_token = to.encode_token(row.id, "access_token", family)
+    refresh_token = to.encode_token(row.id, "refresh_token", family)
 
     to.set_cookie(response, "access_token", access_token)
     to.set_cookie(response, "refresh_token", refresh_token)
@@ -70,7 +94,12 @@ async def signin(
 
 
 @auth_router.post("/signout", status_code=status.HTTP_204_NO_CONTENT)
-async def signout(user_id: auth_dep, response: Response) -> None:
+async def signout(claims: claims_dep, response: Response) -> None:
+    if claims["fam"]:
+        await revocations.revoke_family(claims["fam"])
+    else:
+        await revocations.revoke(claims["jti"], claims["exp"])
+
     to.delete_cookie(response, "access_token")
     to.delete_cookie(response, "refresh_token")
 
@@ -85,18 +114,34 @@ async def refresh(
     if not refresh_token:
         raise HTTPException(status.HTTP_401_UNAUTHORIZED)
 
-    user_id = to.decode_token(refresh_token, "refresh_token")["sub"]
-    access_token = to.encode_token(user_id, "access_token")
+    claims = to.decode_token(refresh_token, "refresh_token")
+
+    if await revocations.is_revoked(claims["fam"]):
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED)
+
+    if not await revocations.rotate(claims["jti"], claims["fam"], claims["exp"]):
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED)
+
+    family = claims["fam"] or str(uuid7())
+    access_token = to.encode_token(claims["sub"], "access_token", family)
+    refresh_token = to.encode_token(claims["sub"], "refresh_token", family)
+
     to.set_cookie(response, "access_token", access_token)
+    to.set_cookie(response, "refresh_token", refresh_token)
 
-    return {"access_token": access_token}
+    return {
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+    }
 
 
 @auth_router.get("/me")
 async def me(user_id: auth_dep, session: session_dep) -> dict[str, Any]:
-    statement = select(User).where(User.id == user_id)
+    statement = select(User.id, User.email, User.username, User.created_at).where(
+        User.id == user_id
+    )
     result = await session.execute(statement)
-    row = result.scalar()
+    row = result.first()
 
     if not row:
         raise HTTPException(status.HTTP_404_NOT_FOUND)
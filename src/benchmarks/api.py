@@ -0,0 +1,315 @@
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any
+from uuid import UUID
+
+from httpx import ASGITransport, AsyncClient, Response
+
+from src.benchmarks.seed import Graph, cleanup, seed
+from src.benchmarks.stats import summarize
+from src.config.auth import pa, to
+from src.config.db import engine, session
+from src.config.pagination import NEXT_CURSOR_HEADER
+from src.main import app
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.samples: defaultdict[str, list[float]] = defaultdict(list)
+        self.errors: Counter[str] = Counter()
+
+    async def request(
+        self, client: AsyncClient, label: str, method: str, url: str, **kwargs: Any
+    ) -> Response:
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.samples[label].append((time.perf_counter() - start) * 1000)
+        self.errors[label] += response.is_error
+        return response
+
+    def report(self, elapsed: float) -> dict[str, Any]:
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "total": summarize(
+                [s for samples in self.samples.values() for s in samples],
+                self.errors.total(),
+                elapsed,
+            ),
+            "endpoints": {
+                label: summarize(samples, self.errors[label], elapsed)
+                for label, samples in sorted(self.samples.items())
+            },
+        }
+
+
+type Scenario = Callable[
+    [AsyncClient, Recorder, Graph, random.Random, dict[str, str]], Awaitable[None]
+]
+
+
+async def feed_scroll(
+    client: AsyncClient,
+    recorder: Recorder,
+    graph: Graph,
+    rng: random.Random,
+    headers: dict[str, str],
+) -> None:
+    params = {"feed": "true", "limit": "20"}
+    for _ in range(3):
+        response = await recorder.request(
+            client,
+            "GET /api/v1/posts?feed",
+            "GET",
+            "/api/v1/posts",
+            params=params,
+            headers=headers,
+        )
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            break
+        params = {**params, "cursor": cursor}
+
+
+async def profile_view(
+    client: AsyncClient,
+    recorder: Recorder,
+    graph: Graph,
+    rng: random.Random,
+    headers: dict[str, str],
+) -> None:
+    id = graph.popular_user(rng)
+    await recorder.request(
+        client, "GET /api/v1/users/{id}", "GET", f"/api/v1/users/{id}", headers=headers
+    )
+    await recorder.request(
+        client,
+        "GET /api/v1/posts?id",
+        "GET",
+        "/api/v1/posts",
+        params={"id": str(id)},
+        headers=headers,
+    )
+    for post in graph.authors[id][:3]:
+        await recorder.request(
+            client,
+            "GET /api/v1/posts/{id}",
+            "GET",
+            f"/api/v1/posts/{post}",
+            headers=headers,
+        )
+
+
+async def like_storm(
+    client: AsyncClient,
+    recorder: Recorder,
+    graph: Graph,
+    rng: random.Random,
+    headers: dict[str, str],
+) -> None:
+    post = graph.posts[0]
+    for _ in range(2):
+        await recorder.request(
+            client,
+            "POST /api/v1/posts/{id}/like",
+            "POST",
+            f"/api/v1/posts/{post}/like",
+            headers=headers,
+        )
+
+
+async def comment_thread(
+    client: AsyncClient,
+    recorder: Recorder,
+    graph: Graph,
+    rng: random.Random,
+    headers: dict[str, str],
+) -> None:
+    post = graph.popular_post(rng)
+    url = f"/api/v1/posts/{post}/comments"
+    await recorder.request(
+        client, "GET /api/v1/posts/{id}/comments", "GET", url, headers=headers
+    )
+    await recorder.request(
+        client,
+        "POST /api/v1/posts/{id}/comments",
+        "POST",
+        url,
+        json={"body": f"{graph.prefix} reply"},
+        headers=headers,
+    )
+    await recorder.request(
+        client, "GET /api/v1/posts/{id}/comments", "GET", url, headers=headers
+    )
+
+
+scenarios: dict[str, Scenario] = {
+    "feed_scroll": feed_scroll,
+    "profile_view": profile_view,
+    "like_storm": like_storm,
+    "comment_thread": comment_thread,
+}
+
+
+async def run_scenario(
+    client: AsyncClient,
+    scenario: Scenario,
+    graph: Graph,
+    rng: random.Random,
+    tokens: dict[UUID, str],
+    iterations: int,
+    concurrency: int,
+) -> dict[str, Any]:
+    recorder = Recorder()
+    limit = asyncio.Semaphore(concurrency)
+    users = [rng.choice(graph.users) for _ in range(iterations)]
+
+    async def worker(user: UUID) -> None:
+        async with limit:
+            await scenario(
+                client,
+                recorder,
+                graph,
+                rng,
+                {"Authorization": f"Bearer {tokens[user]}"},
+            )
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(user) for user in users))
+    return recorder.report(time.perf_counter() - start)
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    rng = random.Random(args.seed)
+
+    async with session() as se:
+        graph = await seed(
+            se,
+            rng,
+            users=args.users,
+            posts=args.posts,
+            follows=args.follows,
+            likes=args.likes,
+            comments=args.comments,
+        )
+
+    tokens = {user: to.encode_token(user, "access_token") for user in graph.users}
+    results: dict[str, Any] = {
+        "config": {
+            "seed": args.seed,
+            "iterations": args.iterations,
+            "concurrency": args.concurrency,
+            **graph.stats(),
+        },
+        "scenarios": {},
+    }
+
+    try:
+        async with AsyncClient(
+            transport=ASGITransport(app, raise_app_exceptions=False),
+            base_url="http://bench",
+        ) as client:
+            for name in args.scenarios:
+                results["scenarios"][name] = await run_scenario(
+                    client,
+                    scenarios[name],
+                    graph,
+                    rng,
+                    tokens,
+                    args.iterations,
+                    args.concurrency,
+                )
+    finally:
+        async with session() as se:
+            await cleanup(se, graph.prefix)
+        await engine.dispose()
+        pa.shutdown()
+
+    return results
+
+
+def compare(
+    baseline: dict[str, Any], candidate: dict[str, Any], threshold: float
+) -> list[dict[str, Any]]:
+    rows = []
+
+    for name, scenario in candidate["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if not before:
+            continue
+
+        for label, current in scenario["endpoints"].items():
+            previous = before["endpoints"].get(label)
+            if not previous:
+                continue
+
+            for metric in ("p50_ms", "p95_ms", "p99_ms"):
+                change = (
+                    current[metric] / previous[metric] - 1 if previous[metric] else 0
+                )
+                rows.append(
+                    {
+                        "scenario": name,
+                        "endpoint": label,
+                        "metric": metric,
+                        "baseline": previous[metric],
+                        "candidate": current[metric],
+                        "change": round(change, 3),
+                        "regression": change > threshold
+                        or current["errors"] > previous["errors"],
+                    }
+                )
+
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.benchmarks.api")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run")
+    run_parser.add_argument("--users", type=int, default=200)
+    run_parser.add_argument("--posts", type=int, default=5)
+    run_parser.add_argument("--follows", type=int, default=20)
+    run_parser.add_argument("--likes", type=int, default=10)
+    run_parser.add_argument("--comments", type=int, default=2)
+    run_parser.add_argument("--iterations", type=int, default=200)
+    run_parser.add_argument("--concurrency", type=int, default=20)
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument(
+        "--scenarios", nargs="+", choices=list(scenarios), default=list(scenarios)
+    )
+    run_parser.add_argument("--output", type=Path)
+    run_parser.add_argument("--baseline", type=Path)
+    run_parser.add_argument("--threshold", type=float, default=0.2)
+
+    compare_parser = commands.add_parser("compare")
+    compare_parser.add_argument("baseline", type=Path)
+    compare_parser.add_argument("candidate", type=Path)
+    compare_parser.add_argument("--threshold", type=float, default=0.2)
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        candidate = asyncio.run(run(args))
+        if args.output:
+            args.output.write_text(json.dumps(candidate, indent=2))
+        if not args.baseline:
+            print(json.dumps(candidate))
+            return 0
+    else:
+        candidate = json.loads(args.candidate.read_text())
+
+    rows = compare(json.loads(args.baseline.read_text()), candidate, args.threshold)
+    print(json.dumps(rows))
+    return int(any(row["regression"] for row in rows))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
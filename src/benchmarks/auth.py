@@ -0,0 +1,72 @@
+import asyncio
+import json
+import time
+from uuid import uuid7
+
+from src.config.auth import Token
+from src.config.revocation import Revocations, revocations
+from src.config.settings import settings
+
+
+def measure(token: Token, payload: str, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        token.decode_token(payload, "access_token")
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+async def measure_revocations(
+    store: Revocations, claims: dict, iterations: int
+) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await store.is_revoked(claims["jti"], claims["fam"])
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+async def revocation_overhead(
+    token: Token, payload: str, iterations: int, revoked: int
+) -> dict[str, float]:
+    store = Revocations(
+        revocations.client,
+        settings.REVOCATION_CHANNEL,
+        settings.REVOCATION_BLOOM_BITS,
+        settings.REVOCATION_BLOOM_HASHES,
+        settings.REVOCATION_REBUILD_INTERVAL,
+    )
+    store.synced = True
+    for _ in range(revoked):
+        store.bloom.add(str(uuid7()))
+
+    claims = token.decode_token(payload, "access_token")
+    probes = [str(uuid7()) for _ in range(iterations)]
+    false_positives = sum(probe in store.bloom for probe in probes)
+
+    return {
+        "revoked": revoked,
+        "check_us": round(await measure_revocations(store, claims, iterations), 3),
+        "false_positive_rate": round(false_positives / iterations, 5),
+    }
+
+
+def main(iterations: int = 20_000, revoked: int = 100_000) -> None:
+    uncached = Token(cache_size=0)
+    cached = Token()
+    payload = cached.encode_token(uuid7(), "access_token", str(uuid7()))
+
+    print(
+        json.dumps(
+            {
+                "iterations": iterations,
+                "uncached_us": round(measure(uncached, payload, iterations), 3),
+                "cached_us": round(measure(cached, payload, iterations), 3),
+                **asyncio.run(
+                    revocation_overhead(cached, payload, iterations, revoked)
+                ),
+            }
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
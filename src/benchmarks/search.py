@@ -0,0 +1,144 @@
+import argparse
+import asyncio
+import json
+import random
+import string
+import time
+from datetime import UTC, datetime, timedelta
+from uuid import uuid7
+
+from httpx import ASGITransport, AsyncClient
+from sqlmodel import text
+
+from src.benchmarks.seed import cleanup
+from src.benchmarks.stats import summarize
+from src.config.auth import pa, to
+from src.config.db import engine, session
+from src.main import app
+from src.posts.partitions import partitions
+from src.users.models import User
+
+corpus = text(
+    """
+    INSERT INTO posts (id, body, user_id)
+    SELECT uuidv7(-make_interval(secs => g)), (
+        SELECT string_agg(
+            (CAST(:vocabulary AS text[]))[
+                1 + floor(power(random(), 3) * CAST(:size AS int))::int
+            ],
+            ' '
+        )
+        FROM generate_series(1, 8 + g % 8)
+    ), CAST(:user_id AS uuid)
+    FROM generate_series(CAST(:start AS int), CAST(:stop AS int)) AS g
+    """
+)
+
+
+def vocabulary(rng: random.Random, size: int) -> list[str]:
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9))))
+    return sorted(words, key=lambda _: rng.random())
+
+
+async def grow(user_id, words: list[str], start: int, stop: int, chunk: int) -> None:
+    for offset in range(start, stop, chunk):
+        async with session() as se:
+            await se.execute(
+                corpus,
+                {
+                    "vocabulary": words,
+                    "size": len(words),
+                    "user_id": user_id,
+                    "start": offset + 1,
+                    "stop": min(offset + chunk, stop),
+                },
+            )
+            await se.commit()
+
+    async with session() as se:
+        await se.execute(text("ANALYZE posts"))
+        await se.commit()
+
+
+async def measure(client: AsyncClient, q: str, iterations: int) -> dict:
+    samples: list[float] = []
+    errors = 0
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        begin = time.perf_counter()
+        response = await client.get("/api/v1/posts/search", params={"q": q})
+        samples.append((time.perf_counter() - begin) * 1000)
+        errors += response.is_error
+    return summarize(samples, errors, time.perf_counter() - start)
+
+
+async def main(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    words = vocabulary(rng, args.vocabulary)
+    queries = {
+        "common": words[0],
+        "medium": words[len(words) // 20],
+        "rare": words[-1],
+        "phrase": f"{words[1]} {words[2]}",
+        "missing": "zzzzzzzzzz",
+    }
+
+    prefix = f"bench{uuid7().hex[-12:]}"
+    user = User(
+        email=f"{prefix}@bench.com",
+        username=prefix,
+        hashed_password=pa.hasher.hash(prefix),
+    )
+    async with session() as se:
+        se.add(user)
+        now = datetime.now(UTC)
+        await partitions.ensure(se, now - timedelta(seconds=max(args.sizes)), now)
+        await se.commit()
+
+    results = []
+    current = 0
+
+    try:
+        async with AsyncClient(
+            transport=ASGITransport(app, raise_app_exceptions=False),
+            base_url="http://bench",
+            headers={
+                "Authorization": f"Bearer {to.encode_token(user.id, 'access_token')}"
+            },
+        ) as client:
+            for size in sorted(args.sizes):
+                start = time.perf_counter()
+                await grow(user.id, words, current, size, args.chunk)
+                current = size
+
+                results.append(
+                    {
+                        "posts": size,
+                        "seed_s": round(time.perf_counter() - start, 1),
+                        "queries": {
+                            name: await measure(client, q, args.iterations)
+                            for name, q in queries.items()
+                        },
+                    }
+                )
+                print(json.dumps(results[-1]))
+    finally:
+        async with session() as se:
+            await cleanup(se, prefix)
+        await engine.dispose()
+        pa.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m src.benchmarks.search")
+    parser.add_argument(
+        "--sizes", nargs="+", type=int, default=[100_000, 1_000_000, 3_000_000]
+    )
+    parser.add_argument("--vocabulary", type=int, default=5000)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--chunk", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,152 @@
+import random
+from collections import Counter
+from datetime import UTC, datetime, timedelta
+from uuid import UUID, uuid7
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import delete, insert, select
+
+from src.config.auth import pa
+from src.config.settings import settings
+from src.posts.models import Comment, Like, Post, TimelineEntry
+from src.posts.partitions import partitions, uuid7_at
+from src.users.models import Follow, User
+
+
+class Graph:
+    def __init__(self, prefix: str) -> None:
+        self.prefix = prefix
+        self.users: list[UUID] = []
+        self.popularity: list[float] = []
+        self.follows: dict[UUID, list[UUID]] = {}
+        self.posts: list[UUID] = []
+        self.authors: dict[UUID, list[UUID]] = {}
+        self.weights: list[float] = []
+
+    def popular_user(self, rng: random.Random) -> UUID:
+        return rng.choices(self.users, self.popularity)[0]
+
+    def popular_post(self, rng: random.Random) -> UUID:
+        return rng.choices(self.posts, self.weights)[0]
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "users": len(self.users),
+            "follows": sum(len(v) for v in self.follows.values()),
+            "posts": len(self.posts),
+        }
+
+
+async def seed(
+    se: AsyncSession,
+    rng: random.Random,
+    users: int = 200,
+    posts: int = 5,
+    follows: int = 20,
+    likes: int = 10,
+    comments: int = 2,
+    alpha: float = 1.1,
+) -> Graph:
+    graph = Graph(f"bench{uuid7().hex[-12:]}")
+    hashed_password = pa.hasher.hash(graph.prefix)
+    now = datetime.now(UTC)
+
+    graph.users = [uuid7() for _ in range(users)]
+    graph.popularity = [1 / (rank + 1) ** alpha for rank in range(users)]
+
+    follower_count: Counter[UUID] = Counter()
+    for follower in graph.users:
+        targets = set(
+            rng.choices(graph.users, graph.popularity, k=rng.randint(1, 2 * follows))
+        )
+        targets.discard(follower)
+        graph.follows[follower] = list(targets)
+        follower_count.update(targets)
+
+    user_rows = [
+        {
+            "id": id,
+            "email": f"{graph.prefix}{i}@bench.com",
+            "username": f"{graph.prefix}{i}",
+            "hashed_password": hashed_password,
+            "created_at": now - timedelta(days=30),
+            "follower_count": follower_count[id],
+        }
+        for i, id in enumerate(graph.users)
+    ]
+
+    for rank, author in enumerate(graph.users):
+        graph.authors[author] = [
+            uuid7_at(now - timedelta(seconds=rng.uniform(0, 30 * 86400)))
+            for _ in range(rng.randint(0, 2 * posts))
+        ]
+        graph.posts.extend(graph.authors[author])
+        graph.weights.extend([graph.popularity[rank]] * len(graph.authors[author]))
+
+    like_rows = []
+    comment_rows = []
+    like_count: Counter[UUID] = Counter()
+    comment_count: Counter[UUID] = Counter()
+    for user in graph.users:
+        liked = set(
+            rng.choices(graph.posts, graph.weights, k=rng.randint(0, 2 * likes))
+        )
+        like_rows.extend({"user_id": user, "post_id": post} for post in liked)
+        like_count.update(liked)
+
+        for post in rng.choices(
+            graph.posts, graph.weights, k=rng.randint(0, 2 * comments)
+        ):
+            comment_rows.append(
+                {"body": f"{graph.prefix} comment", "user_id": user, "post_id": post}
+            )
+            comment_count[post] += 1
+
+    post_rows = [
+        {
+            "id": id,
+            "body": f"{graph.prefix} post {i}",
+            "user_id": author,
+            "like_count": like_count[id],
+            "comment_count": comment_count[id],
+        }
+        for author, ids in graph.authors.items()
+        for i, id in enumerate(ids)
+    ]
+
+    await partitions.ensure(se, now - timedelta(days=30), now)
+    await se.execute(insert(User), user_rows)
+    await se.execute(
+        insert(Follow),
+        [
+            {"follower_id": follower, "following_id": following}
+            for follower, targets in graph.follows.items()
+            for following in targets
+        ],
+    )
+    if post_rows:
+        await se.execute(insert(Post), post_rows)
+    if like_rows:
+        await se.execute(insert(Like), like_rows)
+    if comment_rows:
+        await se.execute(insert(Comment), comment_rows)
+
+    await se.execute(
+        insert(TimelineEntry).from_select(
+            ["user_id", "created_at", "post_id", "author_id"],
+            select(Follow.follower_id, Post.created_at, Post.id, Post.user_id)
+            .join(Post, Post.user_id == Follow.following_id)  # ty: ignore
+            .join(User, User.id == Follow.following_id)  # ty: ignore
+            .where(
+                Follow.follower_id.in_(graph.users),  # ty: ignore
+                User.follower_count <= settings.TIMELINE_FANOUT_LIMIT,
+            ),
+        )
+    )
+    await se.commit()
+    return graph
+
+
+async def cleanup(se: AsyncSession, prefix: str) -> None:
+    await se.execute(delete(User).where(User.username.startswith(prefix)))  # ty: ignore
+    await se.commit()
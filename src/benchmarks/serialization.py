@@ -0,0 +1,101 @@
+import json
+import time
+from datetime import UTC, datetime, timedelta
+from uuid import uuid7
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from src.config.responses import json_response
+from src.posts.schemas import PostRead
+from src.users.models import User
+
+adapter = TypeAdapter(list[PostRead])
+
+
+def page(size: int) -> list[tuple]:
+    now = datetime.now(UTC)
+    author = User(
+        id=uuid7(),
+        email="bench@bench.com",
+        username="bench",
+        hashed_password="",
+        created_at=now - timedelta(days=30),
+    )
+    return [
+        (
+            uuid7(),
+            "lorem ipsum dolor sit amet " * 8,
+            now - timedelta(minutes=i),
+            i * 3,
+            i,
+            author,
+            i % 2 == 0,
+        )
+        for i in range(size)
+    ]
+
+
+def validated(rows: list[tuple]) -> bytes:
+    posts = [
+        PostRead(
+            id=id,
+            body=body,
+            created_at=created_at,
+            user=user,
+            total_likes=likes,
+            total_comments=comments,
+            is_liked=is_liked,
+        )
+        for id, body, created_at, likes, comments, user, is_liked in rows
+    ]
+    return adapter.dump_json(adapter.validate_python(posts))
+
+
+def compact(rows: list[tuple]) -> Response:
+    return json_response(
+        [
+            {
+                "id": id,
+                "body": body,
+                "created_at": created_at,
+                "user": {
+                    "id": user.id,
+                    "username": user.username,
+                    "created_at": user.created_at,
+                },
+                "total_likes": likes,
+                "total_comments": comments,
+                "is_liked": is_liked,
+            }
+            for id, body, created_at, likes, comments, user, is_liked in rows
+        ]
+    )
+
+
+def measure(fn, rows: list[tuple], iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(rows)
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+def main(sizes: tuple[int, ...] = (20, 100), iterations: int = 2000) -> None:
+    results = []
+
+    for size in sizes:
+        rows = page(size)
+        assert json.loads(validated(rows)) == json.loads(bytes(compact(rows).body))  # noqa: S101
+        results.append(
+            {
+                "page_size": size,
+                "validated_us": round(measure(validated, rows, iterations), 1),
+                "compact_us": round(measure(compact, rows, iterations), 1),
+            }
+        )
+
+    print(json.dumps({"iterations": iterations, "pages": results}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import asyncio
+import json
+import time
+from uuid import uuid7
+
+from httpx import ASGITransport, AsyncClient
+from sqlmodel import delete
+
+from src.benchmarks.stats import summarize
+from src.config.auth import pa
+from src.config.db import engine, session
+from src.config.settings import settings
+from src.main import app
+from src.users.models import User
+
+
+async def main(requests: int = 100, concurrency: int = 20) -> None:
+    prefix = f"bench{uuid7().hex[-12:]}"
+    limit = asyncio.Semaphore(concurrency)
+    samples: list[float] = []
+    errors = 0
+
+    async def signup(client: AsyncClient, i: int) -> None:
+        nonlocal errors
+        async with limit:
+            start = time.perf_counter()
+            response = await client.post(
+                "/api/v1/auth/signup",
+                json={
+                    "email": f"{prefix}{i}@bench.com",
+                    "username": f"{prefix}{i}",
+                    "password": f"{prefix}-correct-horse-{i}",
+                },
+            )
+            samples.append((time.perf_counter() - start) * 1000)
+            errors += response.is_error
+
+    settings.RATE_LIMIT_ENABLED = False
+    await pa.warm_up()
+
+    try:
+        async with AsyncClient(
+            transport=ASGITransport(app), base_url="http://bench"
+        ) as client:
+            start = time.perf_counter()
+            await asyncio.gather(*(signup(client, i) for i in range(requests)))
+            elapsed = time.perf_counter() - start
+
+        print(
+            json.dumps(
+                {"concurrency": concurrency, **summarize(samples, errors, elapsed)}
+            )
+        )
+    finally:
+        async with session() as se:
+            await se.execute(
+                delete(User).where(User.username.startswith(prefix))  # ty: ignore
+            )
+            await se.commit()
+        await engine.dispose()
+        pa.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
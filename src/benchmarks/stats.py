@@ -0,0 +1,17 @@
+from typing import Any
+
+
+def percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def summarize(samples: list[float], errors: int, elapsed: float) -> dict[str, Any]:
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "throughput_rps": round(len(samples) / elapsed, 1),
+        "p50_ms": round(percentile(samples, 0.50), 2),
+        "p95_ms": round(percentile(samples, 0.95), 2),
+        "p99_ms": round(percentile(samples, 0.99), 2),
+    }
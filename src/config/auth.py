@@ -1,25 +1,164 @@
+import asyncio
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
 from datetime import UTC, datetime, timedelta
-from typing import Annotated, Literal
+from hashlib import sha256
+from typing import Annotated, Any, Literal
 from uuid import UUID, uuid7
 
 from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+from cryptography.hazmat.primitives.serialization import (
+    load_pem_private_key,
+    load_pem_public_key,
+)
 from fastapi import Depends, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from jwt import decode, encode
+from jwt import InvalidTokenError, decode, encode, get_unverified_header
+from zxcvbn import zxcvbn
 
+from src.config.revocation import revocations
 from src.config.settings import settings
 
 
-class Password(PasswordHasher):
-    def hash_password(self, password: str) -> str:
-        return self.hash(password)
+def score_password(password: str) -> str | None:
+    result = zxcvbn(password)
+    if result["score"] < 3:
+        return " ".join(result["feedback"]["suggestions"])
+    return None
 
-    def verify_password(self, hashed_password: str, password: str) -> bool:
+
+class Password:
+    def __init__(self) -> None:
+        self.hasher = PasswordHasher(
+            time_cost=settings.ARGON2_TIME_COST,
+            memory_cost=settings.ARGON2_MEMORY_COST,
+            parallelism=settings.ARGON2_PARALLELISM,
+        )
+        self.executor: Executor = (
+            ProcessPoolExecutor(max_workers=settings.HASHER_WORKERS)
+            if settings.HASHER_EXECUTOR == "process"
+            else ThreadPoolExecutor(
+                max_workers=settings.HASHER_WORKERS, thread_name_prefix="argon2"
+            )
+        )
+        self.pending = 0
+        self.scorer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="zxcvbn")
+        self.scoring = 0
+        self.scoring_lock = threading.Lock()
+        self.salt = os.urandom(16)
+        self.strength: OrderedDict[bytes, str | None] = OrderedDict()
+
+    async def run[T](self, fn: Callable[..., T], *args: Any) -> T:
+        if self.pending >= settings.HASHER_WORKERS + settings.HASHER_QUEUE_SIZE:
+            raise HTTPException(
+                status.HTTP_503_SERVICE_UNAVAILABLE, headers={"Retry-After": "1"}
+            )
+
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, fn, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash_password(self, password: str) -> str:
+        return await self.run(self.hasher.hash, password)
+
+    async def verify_password(self, hashed_password: str, password: str) -> bool:
         try:
-            return self.verify(hashed_password, password)
-        except Exception:
+            return await self.run(self.hasher.verify, hashed_password, password)
+        except VerificationError:
+            return False
+        except InvalidHashError:
             return False
 
+    async def check_strength(self, password: str) -> str | None:
+        key = hmac.digest(self.salt, password.encode(), "sha256")
+
+        if key in self.strength:
+            self.strength.move_to_end(key)
+            return self.strength[key]
+
+        if self.scoring >= settings.PASSWORD_STRENGTH_QUEUE_SIZE:
+            raise HTTPException(
+                status.HTTP_503_SERVICE_UNAVAILABLE, headers={"Retry-After": "1"}
+            )
+
+        with self.scoring_lock:
+            self.scoring += 1
+
+        future = self.scorer.submit(score_password, password)
+        future.add_done_callback(self.release_scorer)
+
+        try:
+            result = await asyncio.wait_for(
+                asyncio.wrap_future(future), settings.PASSWORD_STRENGTH_TIMEOUT
+            )
+        except TimeoutError:
+            raise HTTPException(
+                status.HTTP_503_SERVICE_UNAVAILABLE, headers={"Retry-After": "1"}
+            ) from None
+
+        self.strength[key] = result
+        if len(self.strength) > settings.PASSWORD_STRENGTH_CACHE_SIZE:
+            self.strength.popitem(last=False)
+
+        return result
+
+    def release_scorer(self, future: Future) -> None:
+        with self.scoring_lock:
+            self.scoring -= 1
+
+    async def warm_up(self) -> None:
+        await self.check_strength(os.urandom(16).hex())
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        return self.hasher.check_needs_rehash(hashed_password)
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.scorer.shutdown(wait=False, cancel_futures=True)
+
+
+class TokenCache:
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.entries: OrderedDict[bytes, dict[str, Any]] = OrderedDict()
+
+    def get(self, key: bytes) -> dict[str, Any] | None:
+        claims = self.entries.get(key)
+
+        if claims is None:
+            return None
+
+        if claims.get("exp", 0) <= time.time():
+            del self.entries[key]
+            return None
+
+        self.entries.move_to_end(key)
+        return claims
+
+    def set(self, key: bytes, claims: dict[str, Any]) -> None:
+        if not self.maxsize:
+            return
+
+        self.entries[key] = claims
+        self.entries.move_to_end(key)
+
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
 
 class Token:
     expected_type = Literal["access_token", "refresh_token"]
@@ -28,7 +167,44 @@ class Token:
         Depends(OAuth2PasswordBearer(tokenUrl="/api/v1/auth/signin", auto_error=False)),
     ]
 
-    def encode_token(self, user_id, expected_type: expected_type) -> str:
+    def __init__(self, cache_size: int = settings.TOKEN_CACHE_SIZE) -> None:
+        self.claims = TokenCache(cache_size)
+        self.keys: dict[str, Any] = {}
+        self.private_key: Any = None
+
+    @property
+    def symmetric(self) -> bool:
+        return settings.ALGORITHM.startswith("HS")
+
+    def signing_key(self) -> Any:
+        if self.symmetric:
+            return settings.SECRET_KEY.get_secret_value()  # ty: ignore
+
+        if not settings.PRIVATE_KEY:
+            raise RuntimeError("PRIVATE_KEY is not configured")
+
+        if self.private_key is None:
+            self.private_key = load_pem_private_key(
+                settings.PRIVATE_KEY.get_secret_value().encode(), password=None
+            )
+        return self.private_key
+
+    def verifying_key(self, payload: str) -> Any:
+        if self.symmetric:
+            return settings.SECRET_KEY.get_secret_value()  # ty: ignore
+
+        kid = get_unverified_header(payload).get("kid")
+
+        if kid not in self.keys:
+            if kid not in settings.PUBLIC_KEYS:
+                raise HTTPException(status.HTTP_401_UNAUTHORIZED)
+            self.keys[kid] = load_pem_public_key(settings.PUBLIC_KEYS[kid].encode())
+
+        return self.keys[kid]
+
+    def encode_token(
+        self, user_id, expected_type: expected_type, family: str | None = None
+    ) -> str:
         now = datetime.now(UTC)
         delta = (
             timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE)
@@ -41,17 +217,28 @@ class Token:
                 "type": expected_type,
                 "exp": now + delta,
                 "jti": str(uuid7()),
+                **({"fam": family} if family else {}),
             },
-            settings.SECRET_KEY.get_secret_value(),
+            self.signing_key(),
             settings.ALGORITHM,
+            headers=None if self.symmetric else {"kid": settings.KEY_ID},
         )
 
     def decode_token(self, payload: str, expected_type: expected_type):
-        result = decode(
-            payload,
-            settings.SECRET_KEY.get_secret_value(),
-            algorithms=settings.ALGORITHM,
-        )
+        key = sha256(payload.encode()).digest()
+        result = self.claims.get(key)
+
+        if result is None:
+            try:
+                result = decode(
+                    payload,
+                    self.verifying_key(payload),
+                    algorithms=[settings.ALGORITHM],
+                )
+            except InvalidTokenError:
+                raise HTTPException(status.HTTP_401_UNAUTHORIZED) from None
+
+            self.claims.set(key, result)
 
         if not result.get("sub"):
             raise HTTPException(status.HTTP_401_UNAUTHORIZED)
@@ -64,6 +251,7 @@ class Token:
             "type": result.get("type"),
             "exp": result.get("exp"),
             "jti": result.get("jti"),
+            "fam": result.get("fam"),
         }
 
     def set_cookie(self, response: Response, cookie: expected_type, value: str) -> None:
@@ -84,13 +272,23 @@ class Token:
     def delete_cookie(self, response: Response, cookie: expected_type) -> None:
         response.delete_cookie(key=cookie, secure=True)
 
-    def authenticate(self, request: Request, bearer_token: bearer_token) -> UUID:
+    async def verify(
+        self, request: Request, bearer_token: bearer_token
+    ) -> dict[str, Any]:
         token = request.cookies.get("access_token") or bearer_token
 
         if not token:
             raise HTTPException(status.HTTP_401_UNAUTHORIZED)
 
-        return UUID(self.decode_token(token, "access_token")["sub"])
+        claims = self.decode_token(token, "access_token")
+
+        if await revocations.is_revoked(claims["jti"], claims["fam"]):
+            raise HTTPException(status.HTTP_401_UNAUTHORIZED)
+
+        return claims
+
+    async def authenticate(self, request: Request, bearer_token: bearer_token) -> UUID:
+        return UUID((await self.verify(request, bearer_token))["sub"])
 
 
 pa = Password()
@@ -98,3 +296,4 @@ to = Token()
 
 form_data = Annotated[OAuth2PasswordRequestForm, Depends()]
 auth_dep = Annotated[UUID, Depends(to.authenticate)]
+claims_dep = Annotated[dict[str, Any], Depends(to.verify)]
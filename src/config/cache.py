@@ -0,0 +1,71 @@
+import logging
+from collections import Counter
+from collections.abc import Awaitable, Callable
+from typing import Annotated
+
+from fastapi import Depends
+from pydantic import TypeAdapter, ValidationError
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Cache:
+    def __init__(self, client: Redis) -> None:
+        self.client = client
+        self.hits: Counter[str] = Counter()
+        self.misses: Counter[str] = Counter()
+
+    async def fetch[T](
+        self,
+        key: str,
+        adapter: TypeAdapter[T],
+        loader: Callable[[], Awaitable[T | None]],
+        ttl: int,
+    ) -> T | None:
+        namespace = key.split(":", 1)[0]
+
+        try:
+            value = await self.client.get(key)
+        except RedisError:
+            logger.warning("cache get failed for %s", key, exc_info=True)
+            value = None
+
+        if value is not None:
+            try:
+                result = adapter.validate_json(value)
+            except ValidationError:
+                logger.warning("cache value for %s is outdated", key)
+            else:
+                self.hits[namespace] += 1
+                return result
+
+        self.misses[namespace] += 1
+        result = await loader()
+
+        if result is not None:
+            try:
+                await self.client.set(key, adapter.dump_json(result), ex=ttl)
+            except RedisError:
+                logger.warning("cache set failed for %s", key, exc_info=True)
+
+        return result
+
+    async def invalidate(self, *keys: str) -> None:
+        try:
+            await self.client.delete(*keys)
+        except RedisError:
+            logger.warning("cache invalidate failed for %s", keys, exc_info=True)
+
+
+cache = Cache(Redis.from_url(settings.CACHE_URL))
+
+
+def get_cache() -> Cache:
+    return cache
+
+
+cache_dep = Annotated[Cache, Depends(get_cache)]
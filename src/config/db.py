@@ -1,14 +1,131 @@
-from typing import Annotated
+import time
+from typing import Annotated, Any
 
 from fastapi import Depends
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import Engine, event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection
 
+from src.config.profiling import sql_profiler
 from src.config.settings import settings
 
-engine = create_async_engine(settings.DATABASE_URL, echo=settings.DEBUG)
+
+class PoolMetrics:
+    def __init__(self) -> None:
+        self.connects = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def observe_wait(self, seconds: float) -> None:
+        self.wait_seconds += seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def snapshot(self, pool: AsyncAdaptedQueuePool) -> dict[str, Any]:
+        return {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_ms_total": round(self.wait_seconds * 1000, 3),
+            "wait_ms_max": round(self.max_wait_seconds * 1000, 3),
+        }
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    def connect(self) -> PoolProxiedConnection:
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            pool_metrics.timeouts += 1
+            raise
+        finally:
+            pool_metrics.observe_wait(time.perf_counter() - start)
+
+
+def build_engine(
+    url: str, poolclass: type[AsyncAdaptedQueuePool] = AsyncAdaptedQueuePool
+) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        echo=settings.DEBUG,
+        poolclass=poolclass,
+        pool_size=settings.DATABASE_POOL_SIZE,
+        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+        pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+        pool_recycle=settings.DATABASE_POOL_RECYCLE,
+        pool_pre_ping=settings.DATABASE_POOL_PRE_PING,
+        connect_args={
+            "prepared_statement_cache_size": settings.DATABASE_STATEMENT_CACHE_SIZE
+        },
+    )
+
+
+engine = build_engine(settings.DATABASE_URL, InstrumentedPool)
 session = async_sessionmaker(engine, expire_on_commit=False)
 
 
+@event.listens_for(engine.sync_engine, "connect")
+def on_connect(dbapi_connection, connection_record) -> None:
+    pool_metrics.connects += 1
+
+
+@event.listens_for(engine.sync_engine, "checkout")
+def on_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+    pool_metrics.checkouts += 1
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def before_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+) -> None:
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def after_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+) -> None:
+    start = conn.info["query_start"].pop()
+    sql_profiler.observe(statement, time.perf_counter() - start)
+
+
+@event.listens_for(Engine, "handle_error")
+def handle_error(exception_context) -> None:
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+def is_foreign_key_violation(error: IntegrityError) -> bool:
+    return getattr(error.orig, "sqlstate", None) == "23503"
+
+
+def is_missing_partition(error: IntegrityError) -> bool:
+    # partition routing failures are check violations without a constraint
+    cause = getattr(error.orig, "__cause__", None)
+    return (
+        getattr(error.orig, "sqlstate", None) == "23514"
+        and getattr(cause, "constraint_name", "") is None
+    )
+
+
 async def get_session():
     async with session() as se:
         yield se
@@ -0,0 +1,201 @@
+import asyncio
+import logging
+import math
+import time
+from collections import OrderedDict
+from contextlib import suppress
+
+from fastapi import Depends, HTTPException, Request, status
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.config.auth import auth_dep
+from src.config.cache import cache, cache_dep
+from src.config.metrics import LONG_LIVED_PATHS, metrics
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local lease = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local granted = math.min(lease, math.floor(tokens))
+local retry = 0
+if granted >= 1 then
+    tokens = tokens - granted
+else
+    granted = 0
+    retry = math.ceil((1 - tokens) / rate * 1000)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000))
+return {granted, retry}
+"""
+
+
+class Bucket:
+    def __init__(self) -> None:
+        self.tokens = 0
+        self.blocked_until = 0.0
+
+
+class RateLimiter:
+    def __init__(
+        self, policies: dict[str, tuple[float, int]], maxsize: int, lease: int
+    ) -> None:
+        self.policies = policies
+        self.maxsize = maxsize
+        self.lease = lease
+        self.buckets: OrderedDict[str, Bucket] = OrderedDict()
+        self.script = cache.client.register_script(BUCKET_SCRIPT)
+
+    def bucket(self, key: str) -> Bucket:
+        bucket = self.buckets.get(key)
+
+        if bucket is None:
+            bucket = self.buckets[key] = Bucket()
+            if len(self.buckets) > self.maxsize:
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(key)
+
+        return bucket
+
+    def reject(self, policy: str, retry: float) -> HTTPException:
+        metrics.registry.inc("rate_limited_total", policy=policy)
+        return HTTPException(
+            status.HTTP_429_TOO_MANY_REQUESTS,
+            headers={"Retry-After": str(max(1, math.ceil(retry)))},
+        )
+
+    async def check(self, client: Redis, policy: str, identity: str) -> None:
+        rate, burst = self.policies[policy]
+        key = f"ratelimit:{policy}:{identity}"
+        now = time.monotonic()
+        bucket = self.bucket(key)
+
+        if bucket.tokens:
+            bucket.tokens -= 1
+            return
+
+        if bucket.blocked_until > now:
+            raise self.reject(policy, bucket.blocked_until - now)
+
+        lease = max(1, min(self.lease, burst))
+        try:
+            granted, retry = await self.script(
+                keys=[key], args=[rate, burst, lease], client=client
+            )
+        except RedisError:
+            logger.warning("rate limit check failed for %s", key, exc_info=True)
+            return
+
+        if not granted:
+            bucket.blocked_until = now + retry / 1000
+            raise self.reject(policy, retry / 1000)
+
+        bucket.tokens = granted - 1
+
+    def reset(self) -> None:
+        self.buckets.clear()
+
+
+rate_limiter = RateLimiter(
+    {
+        "auth": (settings.RATE_LIMIT_AUTH_RATE, settings.RATE_LIMIT_AUTH_BURST),
+        "write": (settings.RATE_LIMIT_WRITE_RATE, settings.RATE_LIMIT_WRITE_BURST),
+    },
+    settings.RATE_LIMIT_CACHE_SIZE,
+    settings.RATE_LIMIT_LEASE,
+)
+
+
+def limit_by_ip(policy: str):
+    async def dependency(request: Request, cache: cache_dep) -> None:
+        if settings.RATE_LIMIT_ENABLED:
+            host = request.client.host if request.client else "unknown"
+            await rate_limiter.check(cache.client, policy, host)
+
+    return Depends(dependency)
+
+
+def limit_by_user(policy: str):
+    async def dependency(user_id: auth_dep, cache: cache_dep) -> None:
+        if settings.RATE_LIMIT_ENABLED:
+            await rate_limiter.check(cache.client, policy, str(user_id))
+
+    return Depends(dependency)
+
+
+class LoopMonitor:
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.lag = 0.0
+        self.task: asyncio.Task | None = None
+
+    async def run(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lag = max(0.0, time.perf_counter() - start - self.interval)
+
+    def start(self) -> None:
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self.task:
+            self.task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.task
+            self.task = None
+
+
+loop_monitor = LoopMonitor(settings.LOAD_SHED_INTERVAL)
+
+
+class LoadShedMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.in_flight = 0
+
+    def overloaded(self) -> bool:
+        lag_ms = loop_monitor.lag * 1000
+        if settings.LOAD_SHED_LAG_MS and lag_ms > settings.LOAD_SHED_LAG_MS:
+            return True
+
+        limit = settings.LOAD_SHED_MAX_IN_FLIGHT
+        return bool(limit) and self.in_flight >= limit
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(("/health", "/metrics")):
+            await self.app(scope, receive, send)
+            return
+
+        if self.overloaded():
+            metrics.registry.inc("requests_shed_total")
+            response = JSONResponse(
+                {"detail": "Service Unavailable"},
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": "1"},
+            )
+            await response(scope, receive, send)
+            return
+
+        if scope["path"].startswith(LONG_LIVED_PATHS):
+            await self.app(scope, receive, send)
+            return
+
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
@@ -0,0 +1,242 @@
+import asyncio
+import logging
+import os
+import time
+from bisect import bisect_left
+from contextlib import suppress
+from pathlib import Path
+from typing import Any
+
+import orjson
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.config.cache import cache
+from src.config.db import engine, pool_metrics
+from src.config.profiling import route_name
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+LONG_LIVED_PATHS = ("/api/v1/stream",)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+FAMILIES = {
+    "http_requests_total": ("counter", "HTTP requests by route, method and status."),
+    "http_request_duration_seconds": ("histogram", "HTTP request latency by route."),
+    "http_requests_in_flight": ("gauge", "HTTP requests currently being served."),
+    "http_streams_open": ("gauge", "Long-lived streaming responses currently open."),
+    "auth_failures_total": ("counter", "Requests rejected with 401 by route."),
+    "rate_limited_total": ("counter", "Requests rejected with 429 by policy."),
+    "requests_shed_total": ("counter", "Requests shed with 503 under overload."),
+    "cache_requests_total": ("counter", "Cache lookups by namespace and result."),
+    "db_pool_connections": ("gauge", "Pooled database connections by state."),
+    "db_pool_checkouts_total": ("counter", "Database connection checkouts."),
+    "db_pool_timeouts_total": ("counter", "Database connection checkout timeouts."),
+    "db_pool_wait_seconds_total": ("counter", "Time spent waiting for a connection."),
+}
+
+type Labels = tuple[tuple[str, str], ...]
+
+
+class Registry:
+    def __init__(self) -> None:
+        self.values: dict[tuple[str, Labels], float] = {}
+        self.histograms: dict[tuple[str, Labels], list[float]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        key = (name, tuple(labels.items()))
+        self.values[key] = self.values.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels: str) -> None:
+        self.values[name, tuple(labels.items())] = value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = (name, tuple(labels.items()))
+        row = self.histograms.get(key)
+        if row is None:
+            row = self.histograms[key] = [0.0] * (len(BUCKETS) + 2)
+        row[bisect_left(BUCKETS, value)] += 1
+        row[-1] += value
+
+    def snapshot(self, gauges: bool = True) -> dict[str, Any]:
+        return {
+            "pid": os.getpid(),
+            "time": time.time(),
+            "values": [
+                [name, labels, value]
+                for (name, labels), value in self.values.items()
+                if gauges or FAMILIES[name][0] != "gauge"
+            ],
+            "histograms": [
+                [name, labels, row] for (name, labels), row in self.histograms.items()
+            ],
+        }
+
+
+def escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def format_labels(labels: Labels, *extra: tuple[str, str]) -> str:
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{escape(str(value))}"' for key, value in pairs) + "}"
+
+
+def render(snapshots: list[dict[str, Any]], max_age: float) -> str:
+    now = time.time()
+    values: dict[tuple[str, Labels], float] = {}
+    histograms: dict[tuple[str, Labels], list[float]] = {}
+
+    for snapshot in snapshots:
+        stale = now - snapshot["time"] > max_age
+        for name, labels, value in snapshot["values"]:
+            if stale and FAMILIES[name][0] == "gauge":
+                continue
+            key = (name, tuple(map(tuple, labels)))
+            values[key] = values.get(key, 0) + value
+        for name, labels, row in snapshot["histograms"]:
+            key = (name, tuple(map(tuple, labels)))
+            merged = histograms.setdefault(key, [0] * len(row))
+            for i, value in enumerate(row):
+                merged[i] += value
+
+    lines = []
+    for family, (kind, description) in FAMILIES.items():
+        lines += [f"# HELP {family} {description}", f"# TYPE {family} {kind}"]
+
+        for (name, labels), value in sorted(values.items()):
+            if name == family:
+                lines.append(f"{name}{format_labels(labels)} {value}")
+
+        for (name, labels), row in sorted(histograms.items()):
+            if name != family:
+                continue
+            count = 0
+            for le, value in zip((*BUCKETS, "+Inf"), row, strict=False):
+                count += value
+                bucket = format_labels(labels, ("le", str(le)))
+                lines.append(f"{name}_bucket{bucket} {count}")
+            lines.append(f"{name}_sum{format_labels(labels)} {row[-1]}")
+            lines.append(f"{name}_count{format_labels(labels)} {count}")
+
+    return "\n".join(lines) + "\n"
+
+
+class Metrics:
+    def __init__(self, directory: str | None, interval: float) -> None:
+        self.registry = Registry()
+        self.directory = Path(directory) if directory else None
+        self.interval = interval
+        self.task: asyncio.Task | None = None
+
+    def collect(self) -> None:
+        registry = self.registry
+        pool = pool_metrics.snapshot(engine.pool)  # ty: ignore
+
+        for state in ("checked_in", "checked_out", "overflow"):
+            registry.set("db_pool_connections", pool[state], state=state)
+        registry.set("db_pool_checkouts_total", pool["checkouts"])
+        registry.set("db_pool_timeouts_total", pool["timeouts"])
+        registry.set("db_pool_wait_seconds_total", pool["wait_ms_total"] / 1000)
+
+        for result, counter in (("hit", cache.hits), ("miss", cache.misses)):
+            for namespace, count in counter.items():
+                registry.set(
+                    "cache_requests_total", count, namespace=namespace, result=result
+                )
+
+    def write(self, gauges: bool = True) -> None:
+        if not self.directory:
+            return
+
+        path = self.directory / f"{os.getpid()}.json"
+        temp = path.with_suffix(".tmp")
+        temp.write_bytes(orjson.dumps(self.registry.snapshot(gauges)))
+        temp.replace(path)
+
+    def read(self) -> list[dict[str, Any]]:
+        if not self.directory:
+            return [self.registry.snapshot()]
+
+        snapshots = []
+        for path in self.directory.glob("*.json"):
+            with suppress(FileNotFoundError):
+                snapshots.append(orjson.loads(path.read_bytes()))
+        return snapshots
+
+    def export(self) -> str:
+        self.collect()
+        self.write()
+        return render(self.read(), self.interval * 3)
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.collect()
+                self.write()
+            except Exception:
+                logger.exception("metrics write failed")
+
+    def start(self) -> None:
+        if self.directory:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self.task:
+            self.task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.task
+            self.task = None
+
+            self.collect()
+            self.write(gauges=False)
+
+
+metrics = Metrics(settings.METRICS_DIR, settings.METRICS_FLUSH_INTERVAL)
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        registry = metrics.registry
+        start = time.perf_counter()
+        status_code = 500
+        long_lived = scope["path"].startswith(LONG_LIVED_PATHS)
+        gauge = "http_streams_open" if long_lived else "http_requests_in_flight"
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        registry.inc(gauge)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            registry.inc(gauge, -1)
+            route = route_name(scope)
+            if not long_lived:
+                registry.observe(
+                    "http_request_duration_seconds",
+                    time.perf_counter() - start,
+                    route=route,
+                )
+            registry.inc(
+                "http_requests_total",
+                route=route,
+                method=scope["method"],
+                status=str(status_code),
+            )
+            if status_code == 401:
+                registry.inc("auth_failures_total", route=route)
@@ -0,0 +1,36 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from uuid import UUID
+
+from fastapi import HTTPException, status
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TRUNCATED_HEADER = "X-Truncated"
+
+
+def encode_cursor(created_at: datetime, id: UUID) -> str:
+    payload = f"{created_at.isoformat()}|{id}".encode()
+    return urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        payload = urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, id = payload.split("|")
+        return datetime.fromisoformat(created_at), UUID(id)
+    except ValueError:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST) from None
+
+
+def encode_rank_cursor(score: float, key: str) -> str:
+    payload = f"{score!r}|{key}".encode()
+    return urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_rank_cursor(cursor: str) -> tuple[float, str]:
+    try:
+        payload = urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        score, key = payload.split("|", 1)
+        return float(score), key
+    except ValueError:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST) from None
@@ -0,0 +1,149 @@
+import logging
+import random
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+def route_name(scope: Scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class Profile:
+    def __init__(self, scope: Scope) -> None:
+        self.scope = scope
+        self.start = time.perf_counter()
+        self.statements = 0
+        self.seconds = 0.0
+        self.shapes: Counter[str] = Counter()
+
+    @property
+    def n_plus_one(self) -> list[tuple[str, int]]:
+        return [
+            (statement, count)
+            for statement, count in self.shapes.most_common()
+            if count >= settings.SQL_N_PLUS_ONE_THRESHOLD
+        ]
+
+    def server_timing(self) -> str:
+        total = (time.perf_counter() - self.start) * 1000
+        db = self.seconds * 1000
+        return (
+            f'db;dur={db:.3f};desc="{self.statements} queries", '
+            f"app;dur={total - db:.3f}"
+        )
+
+
+current: ContextVar[Profile | None] = ContextVar("profile", default=None)
+
+
+class RouteStats:
+    def __init__(self) -> None:
+        self.requests = 0
+        self.statements = 0
+        self.seconds = 0.0
+        self.n_plus_one = 0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def observe(self, profile: Profile) -> None:
+        self.requests += 1
+        self.statements += profile.statements
+        self.seconds += profile.seconds
+        self.n_plus_one += bool(profile.n_plus_one)
+        self.buckets[bisect_left(BUCKETS_MS, profile.seconds * 1000)] += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "statements": self.statements,
+            "db_ms_total": round(self.seconds * 1000, 3),
+            "n_plus_one": self.n_plus_one,
+            "buckets": {
+                **{
+                    str(le): count
+                    for le, count in zip(BUCKETS_MS, self.buckets, strict=False)
+                },
+                "+Inf": self.buckets[-1],
+            },
+        }
+
+
+class SQLProfiler:
+    def __init__(self) -> None:
+        self.routes: dict[str, RouteStats] = {}
+        self.slow_queries = 0
+
+    def observe(self, statement: str, seconds: float) -> None:
+        profile = current.get()
+
+        if profile is not None:
+            profile.statements += 1
+            profile.seconds += seconds
+            profile.shapes[statement] += 1
+
+        if seconds * 1000 >= settings.SQL_SLOW_QUERY_MS:
+            self.slow_queries += 1
+            logger.warning(
+                "slow query %s %.1fms: %s",
+                route_name(profile.scope) if profile else None,
+                seconds * 1000,
+                statement,
+            )
+
+    def finish(self, profile: Profile) -> None:
+        route = route_name(profile.scope)
+
+        for statement, count in profile.n_plus_one:
+            logger.warning("repeated query %s %dx: %s", route, count, statement)
+
+        if random.random() < settings.SQL_PROFILE_SAMPLE_RATE:  # noqa: S311
+            self.routes.setdefault(route, RouteStats()).observe(profile)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "sample_rate": settings.SQL_PROFILE_SAMPLE_RATE,
+            "slow_queries": self.slow_queries,
+            "routes": {
+                route: stats.snapshot() for route, stats in sorted(self.routes.items())
+            },
+        }
+
+
+sql_profiler = SQLProfiler()
+
+
+class ProfilingMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.SQL_PROFILE:
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(scope)
+        token = current.set(profile)
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", profile.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current.reset(token)
+            sql_profiler.finish(profile)
@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import time
+from contextlib import suppress
+from http.cookies import SimpleCookie
+from typing import Annotated, Any
+
+from fastapi import Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlmodel import text
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.config.db import build_engine, session_dep
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+STICKY_COOKIE = "db_sticky"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+REPLICA_LAG = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE coalesce(
+            extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0
+        )
+    END
+    """
+)
+
+
+class Replica:
+    def __init__(self, url: str) -> None:
+        self.engine = build_engine(url)
+        self.session = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.healthy = True
+        self.lag: float | None = None
+        self.failures = 0
+        self.reads = 0
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "host": self.engine.url.host,
+            "healthy": self.healthy,
+            "lag_s": self.lag,
+            "failures": self.failures,
+            "reads": self.reads,
+        }
+
+
+class ReplicaRouter:
+    def __init__(self, urls: list[str], max_lag: float, interval: float) -> None:
+        self.replicas = [Replica(url) for url in urls]
+        self.max_lag = max_lag
+        self.interval = interval
+        self.cursor = 0
+        self.primary_reads = 0
+        self.sticky_reads = 0
+        self.task: asyncio.Task | None = None
+
+    def choose(self) -> Replica | None:
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[self.cursor % len(self.replicas)]
+            self.cursor += 1
+            if replica.healthy:
+                replica.reads += 1
+                return replica
+
+        self.primary_reads += 1
+        return None
+
+    async def check(self, replica: Replica) -> None:
+        try:
+            async with asyncio.timeout(settings.HEALTH_CHECK_TIMEOUT):
+                async with replica.engine.connect() as conn:
+                    replica.lag = float(await conn.scalar(REPLICA_LAG))
+        except Exception:
+            if replica.healthy:
+                logger.warning(
+                    "replica %s failed its health check",
+                    replica.engine.url.host,
+                    exc_info=True,
+                )
+            replica.healthy = False
+            replica.failures += 1
+            return
+
+        replica.healthy = replica.lag <= self.max_lag
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.gather(*(self.check(replica) for replica in self.replicas))
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self.replicas:
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self.task:
+            self.task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.task
+            self.task = None
+
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "primary_reads": self.primary_reads,
+            "sticky_reads": self.sticky_reads,
+            "replicas": [replica.snapshot() for replica in self.replicas],
+        }
+
+
+replicas = ReplicaRouter(
+    settings.replica_urls,
+    settings.DATABASE_REPLICA_MAX_LAG,
+    settings.DATABASE_REPLICA_CHECK_INTERVAL,
+)
+
+
+def is_sticky(request: Request) -> bool:
+    try:
+        return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+async def get_read_session(request: Request, primary: session_dep):
+    if not replicas.replicas:
+        yield primary
+        return
+
+    if is_sticky(request):
+        replicas.sticky_reads += 1
+        yield primary
+        return
+
+    replica = replicas.choose()
+
+    if replica is None:
+        yield primary
+        return
+
+    async with replica.session() as se:
+        yield se
+
+
+read_session_dep = Annotated[AsyncSession, Depends(get_read_session)]
+
+
+class StickyWritesMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] in SAFE_METHODS
+            or not replicas.replicas
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                window = settings.DATABASE_STICKY_WINDOW
+                cookie: SimpleCookie = SimpleCookie()
+                cookie[STICKY_COOKIE] = str(time.time() + window)
+                cookie[STICKY_COOKIE]["max-age"] = int(window) + 1
+                cookie[STICKY_COOKIE]["path"] = "/"
+                cookie[STICKY_COOKIE]["httponly"] = True
+                cookie[STICKY_COOKIE]["secure"] = True
+                cookie[STICKY_COOKIE]["samesite"] = "lax"
+                headers = MutableHeaders(scope=message)
+                headers.append("set-cookie", cookie.output(header="").strip())
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
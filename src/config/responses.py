@@ -0,0 +1,34 @@
+from hashlib import blake2b
+from typing import Any
+
+import orjson
+from fastapi import Request, Response, status
+
+
+def json_response(content: Any, headers: dict[str, str] | None = None) -> Response:
+    return Response(
+        orjson.dumps(content, default=str, option=orjson.OPT_UTC_Z),
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+def make_etag(*parts: Any) -> str:
+    digest = blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+
+    if not header:
+        return False
+
+    if header.strip() == "*":
+        return True
+
+    return etag in (tag.strip().removeprefix("W/") for tag in header.split(","))
+
+
+def not_modified(headers: dict[str, str]) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import math
+import time
+from collections.abc import Iterator
+from contextlib import suppress
+from datetime import timedelta
+from hashlib import blake2b
+from typing import Any
+
+from fastapi import HTTPException, status
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from src.config.cache import cache
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    def __init__(self, bits: int, hashes: int) -> None:
+        self.bits = bits
+        self.hashes = hashes
+        self.array = bytearray((bits + 7) // 8)
+        self.count = 0
+
+    def positions(self, key: str) -> Iterator[int]:
+        digest = blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8])
+        h2 = int.from_bytes(digest[8:]) | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.bits
+
+    def add(self, key: str) -> None:
+        for position in self.positions(key):
+            self.array[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(
+            self.array[position >> 3] & (1 << (position & 7))
+            for position in self.positions(key)
+        )
+
+
+class Revocations:
+    def __init__(
+        self, client: Redis, channel: str, bits: int, hashes: int, rebuild: float
+    ) -> None:
+        self.client = client
+        self.channel = channel
+        self.bits = bits
+        self.hashes = hashes
+        self.rebuild = rebuild
+        self.bloom = BloomFilter(bits, hashes)
+        self.synced = False
+        self.loaded = False
+        self.local_checks = 0
+        self.remote_checks = 0
+        self.revoked = 0
+        self.reused = 0
+        self.task: asyncio.Task | None = None
+
+    async def is_revoked(self, *ids: str | None) -> bool:
+        keys = [id for id in ids if id]
+
+        if not keys:
+            return False
+
+        if self.synced and not any(key in self.bloom for key in keys):
+            self.local_checks += 1
+            return False
+
+        self.remote_checks += 1
+        try:
+            return bool(await self.client.exists(*(f"revoked:{key}" for key in keys)))
+        except RedisError:
+            logger.warning("revocation check failed for %s", keys, exc_info=True)
+
+        # revoke() fails while redis is down, so the last loaded filter is complete
+        if self.loaded and not any(key in self.bloom for key in keys):
+            return False
+
+        raise HTTPException(
+            status.HTTP_503_SERVICE_UNAVAILABLE, headers={"Retry-After": "1"}
+        )
+
+    async def mark(self, id: str, expires_at: float, nx: bool = False) -> bool:
+        ttl = max(1, math.ceil(expires_at - time.time()))
+
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.set(f"revoked:{id}", 1, ex=ttl, nx=nx)
+            pipe.publish(self.channel, id)
+            created, _ = await pipe.execute()
+
+        self.bloom.add(id)
+        self.revoked += bool(created)
+        return bool(created)
+
+    async def revoke(self, id: str, expires_at: float) -> None:
+        try:
+            await self.mark(id, expires_at)
+        except RedisError:
+            logger.warning("token revocation failed for %s", id, exc_info=True)
+            raise HTTPException(
+                status.HTTP_503_SERVICE_UNAVAILABLE, headers={"Retry-After": "1"}
+            ) from None
+
+    async def revoke_family(self, family: str) -> None:
+        lifetime = timedelta(days=settings.REFRESH_TOKEN_EXPIRE).total_seconds()
+        await self.revoke(family, time.time() + lifetime)
+
+    async def rotate(self, jti: str, family: str | None, expires_at: float) -> bool:
+        try:
+            if await self.mark(jti, expires_at, nx=True):
+                return True
+        except RedisError:
+            logger.warning("token rotation failed for %s", jti, exc_info=True)
+            raise HTTPException(
+                status.HTTP_503_SERVICE_UNAVAILABLE, headers={"Retry-After": "1"}
+            ) from None
+
+        self.reused += 1
+        logger.warning("refresh token reuse detected", extra={"family": family})
+
+        if family:
+            await self.revoke_family(family)
+
+        return False
+
+    async def load(self) -> BloomFilter:
+        bloom = BloomFilter(self.bits, self.hashes)
+        async for key in self.client.scan_iter(match="revoked:*", count=1000):
+            bloom.add(key.decode().split(":", 1)[1])
+        return bloom
+
+    async def listen(self) -> None:
+        async with self.client.pubsub(ignore_subscribe_messages=True) as pubsub:
+            await pubsub.subscribe(self.channel)
+            self.bloom = await self.load()
+            self.synced = self.loaded = True
+            deadline = time.monotonic() + self.rebuild
+
+            while True:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+                if message is not None:
+                    self.bloom.add(message["data"].decode())
+
+                if time.monotonic() >= deadline:
+                    self.bloom = await self.load()
+                    deadline = time.monotonic() + self.rebuild
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.listen()
+            except Exception:
+                logger.warning("revocation sync lost", exc_info=True)
+            finally:
+                self.synced = False
+
+            await asyncio.sleep(1)
+
+    def start(self) -> None:
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self.task:
+            self.task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.task
+            self.task = None
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "synced": self.synced,
+            "bloom_bits": self.bits,
+            "bloom_entries": self.bloom.count,
+            "local_checks": self.local_checks,
+            "remote_checks": self.remote_checks,
+            "revoked": self.revoked,
+            "reused": self.reused,
+        }
+
+
+revocations = Revocations(
+    cache.client,
+    settings.REVOCATION_CHANNEL,
+    settings.REVOCATION_BLOOM_BITS,
+    settings.REVOCATION_BLOOM_HASHES,
+    settings.REVOCATION_REBUILD_INTERVAL,
+)
@@ -1,21 +1,106 @@
-from pydantic import SecretStr
+from typing import Literal, Self
+
+from pydantic import SecretStr, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
     DEBUG: bool
     DATABASE_URL: str
+    DATABASE_POOL_SIZE: int = 5
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT: float = 30
+    DATABASE_POOL_RECYCLE: int = 1800
+    DATABASE_POOL_PRE_PING: bool = True
+    DATABASE_STATEMENT_CACHE_SIZE: int = 100
+    DATABASE_REPLICA_URLS: str = ""
+    DATABASE_REPLICA_MAX_LAG: float = 5
+    DATABASE_REPLICA_CHECK_INTERVAL: float = 2
+    DATABASE_STICKY_WINDOW: float = 5
     CACHE_URL: str
+    CACHE_POST_TTL: int = 60
+    CACHE_USER_TTL: int = 300
+    CACHE_COMMENTS_TTL: int = 30
+    TIMELINE_SIZE: int = 800
+    TIMELINE_BACKFILL: int = 50
+    TIMELINE_FANOUT_LIMIT: int = 10000
+    TIMELINE_JOB_INTERVAL: float = 5
+    TIMELINE_TRIM_INTERVAL: float = 300
+    TIMELINE_JOB_BATCH: int = 1000
+    HTTP_USER_MAX_AGE: int = 60
     FRONTEND_URL: str
+    METRICS_TOKEN: SecretStr | None = None
+    METRICS_DIR: str | None = None
+    METRICS_FLUSH_INTERVAL: float = 5
+    HEALTH_CHECK_TIMEOUT: float = 2
     ALGORITHM: str = "HS256"
-    SECRET_KEY: SecretStr  # openssl rand -hex 32
+    SECRET_KEY: SecretStr | None = None  # openssl rand -hex 32
+    PRIVATE_KEY: SecretStr | None = None  # openssl genpkey -algorithm ed25519
+    PUBLIC_KEYS: dict[str, str] = {}
+    KEY_ID: str | None = None
+    TOKEN_CACHE_SIZE: int = 10000
+    REVOCATION_CHANNEL: str = "revocations"
+    REVOCATION_BLOOM_BITS: int = 1 << 23
+    REVOCATION_BLOOM_HASHES: int = 7
+    REVOCATION_REBUILD_INTERVAL: float = 300
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536
+    ARGON2_PARALLELISM: int = 4
+    HASHER_EXECUTOR: Literal["thread", "process"] = "thread"
+    HASHER_WORKERS: int = 4
+    HASHER_QUEUE_SIZE: int = 64
+    PASSWORD_STRENGTH_TIMEOUT: float = 0.5
+    PASSWORD_STRENGTH_QUEUE_SIZE: int = 8
+    PASSWORD_STRENGTH_CACHE_SIZE: int = 10000
     ACCESS_TOKEN_EXPIRE: int
     REFRESH_TOKEN_EXPIRE: int
+    LIKES_WRITE_BEHIND: bool = False  # counts lag by up to LIKES_FLUSH_INTERVAL
+    LIKES_FLUSH_INTERVAL: float = 1.0
+    LIKES_FLUSH_SIZE: int = 1000
+    USER_TRIE_SIZE: int = 0
+    USER_TRIE_REFRESH: float = 300
+    POST_SEARCH_CANDIDATES: int = 1000
+    PARTITION_PREMAKE: int = 3
+    PARTITION_RETENTION: int = 0
+    PARTITION_ARCHIVE_SCHEMA: str = "archive"
+    PARTITION_MAINTENANCE_INTERVAL: float = 3600
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_AUTH_RATE: float = 0.2
+    RATE_LIMIT_AUTH_BURST: int = 10
+    RATE_LIMIT_WRITE_RATE: float = 5
+    RATE_LIMIT_WRITE_BURST: int = 30
+    RATE_LIMIT_CACHE_SIZE: int = 10000
+    RATE_LIMIT_LEASE: int = 5
+    LOAD_SHED_LAG_MS: float = 250
+    LOAD_SHED_MAX_IN_FLIGHT: int = 0
+    LOAD_SHED_INTERVAL: float = 0.1
+    STREAM_BACKEND: Literal["redis", "postgres"] = "redis"
+    STREAM_CHANNEL: str = "stream"
+    STREAM_QUEUE_SIZE: int = 64
+    STREAM_KEEPALIVE: float = 15
+    STREAM_MAX_CONNECTIONS: int = 20000
+    SQL_PROFILE: bool = True
+    SQL_SLOW_QUERY_MS: float = 200
+    SQL_N_PLUS_ONE_THRESHOLD: int = 5
+    SQL_PROFILE_SAMPLE_RATE: float = 0.1
+
+    @model_validator(mode="after")
+    def validate_keys(self) -> Self:
+        if self.ALGORITHM.startswith("HS") and not self.SECRET_KEY:
+            raise ValueError("SECRET_KEY is required for HMAC algorithms")
+        if not self.ALGORITHM.startswith("HS") and not self.PUBLIC_KEYS:
+            raise ValueError("PUBLIC_KEYS is required for asymmetric algorithms")
+        return self
 
     @property
     def origins(self) -> list[str]:
         return [url.strip() for url in self.FRONTEND_URL.split(",")]
 
+    @property
+    def replica_urls(self) -> list[str]:
+        urls = self.DATABASE_REPLICA_URLS.split(",")
+        return [url.strip() for url in urls if url.strip()]
+
     model_config = SettingsConfigDict(env_file=".env")
 
 
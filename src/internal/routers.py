@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import os
+from hmac import compare_digest
+from typing import Annotated, Any
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from fastapi.responses import PlainTextResponse
+from sqlmodel import text
+
+from src.config.cache import cache_dep
+from src.config.db import engine, pool_metrics, session_dep
+from src.config.metrics import metrics
+from src.config.profiling import sql_profiler
+from src.config.replicas import replicas
+from src.config.revocation import revocations
+from src.config.settings import settings
+from src.posts.buffer import like_buffer
+from src.posts.partitions import partitions
+from src.posts.timeline import timeline_jobs
+from src.stream.broker import broker
+
+logger = logging.getLogger(__name__)
+
+
+def authorize(authorization: Annotated[str | None, Header()] = None) -> None:
+    token = settings.METRICS_TOKEN
+
+    if not token or not authorization:
+        raise HTTPException(status.HTTP_404_NOT_FOUND)
+
+    if not compare_digest(
+        authorization.encode("latin-1"), f"Bearer {token.get_secret_value()}".encode()
+    ):
+        raise HTTPException(status.HTTP_404_NOT_FOUND)
+
+
+health_router = APIRouter(tags=["internal"], include_in_schema=False)
+
+internal_router = APIRouter(
+    prefix="/internal",
+    tags=["internal"],
+    include_in_schema=False,
+    dependencies=[Depends(authorize)],
+)
+
+
+@internal_router.get("/pool")
+async def pool() -> dict[str, Any]:
+    return {
+        "pid": os.getpid(),
+        **pool_metrics.snapshot(engine.pool),  # ty: ignore
+    }
+
+
+@internal_router.get("/replicas")
+async def replica() -> dict[str, Any]:
+    return {"pid": os.getpid(), **replicas.snapshot()}
+
+
+@internal_router.get("/likes")
+async def likes() -> dict[str, Any]:
+    return {"pid": os.getpid(), **like_buffer.snapshot()}
+
+
+@internal_router.get("/partitions")
+async def partition() -> dict[str, Any]:
+    return {"pid": os.getpid(), **partitions.snapshot()}
+
+
+@internal_router.get("/timelines")
+async def timelines() -> dict[str, Any]:
+    return {"pid": os.getpid(), **timeline_jobs.snapshot()}
+
+
+@internal_router.get("/stream")
+async def stream() -> dict[str, Any]:
+    return {"pid": os.getpid(), **broker.snapshot()}
+
+
+@internal_router.get("/revocations")
+async def revocation() -> dict[str, Any]:
+    return {"pid": os.getpid(), **revocations.snapshot()}
+
+
+@internal_router.get("/sql")
+async def sql() -> dict[str, Any]:
+    return {"pid": os.getpid(), **sql_profiler.snapshot()}
+
+
+@health_router.get("/metrics", dependencies=[Depends(authorize)])
+async def export() -> PlainTextResponse:
+    return PlainTextResponse(metrics.export(), media_type="text/plain; version=0.0.4")
+
+
+@health_router.get("/health/live")
+async def live() -> dict[str, str]:
+    return {"status": "ok"}
+
+
+@health_router.get("/health/ready")
+async def ready(
+    session: session_dep, cache: cache_dep, response: Response
+) -> dict[str, Any]:
+    checks = {}
+
+    try:
+        async with asyncio.timeout(settings.HEALTH_CHECK_TIMEOUT):
+            await session.execute(text("SELECT 1"))
+        checks["database"] = "ok"
+    except Exception:
+        logger.warning("database readiness check failed", exc_info=True)
+        checks["database"] = "unavailable"
+
+    try:
+        async with asyncio.timeout(settings.HEALTH_CHECK_TIMEOUT):
+            await cache.client.ping()
+        checks["cache"] = "ok"
+    except Exception:
+        logger.warning("cache readiness check failed", exc_info=True)
+        checks["cache"] = "unavailable"
+
+    ok = all(value == "ok" for value in checks.values())
+    if not ok:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+
+    return {"status": "ok" if ok else "unavailable", "checks": checks}
@@ -4,18 +4,60 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from src.auth.routers import auth_router
+from src.config.auth import pa
+from src.config.cache import cache
 from src.config.db import engine
+from src.config.limits import LoadShedMiddleware, loop_monitor
+from src.config.metrics import MetricsMiddleware, metrics
+from src.config.pagination import NEXT_CURSOR_HEADER, TRUNCATED_HEADER
+from src.config.profiling import ProfilingMiddleware
+from src.config.replicas import StickyWritesMiddleware, replicas
+from src.config.revocation import revocations
 from src.config.settings import settings
+from src.internal.routers import health_router, internal_router
+from src.posts.buffer import like_buffer
+from src.posts.partitions import partitions
 from src.posts.routers import posts_router
+from src.posts.timeline import timeline_jobs
+from src.stream.broker import broker
+from src.stream.routers import stream_router
 from src.users.routers import users_router
+from src.users.trie import user_trie
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    await pa.warm_up()
+    if settings.LIKES_WRITE_BEHIND:
+        like_buffer.start()
+    if settings.USER_TRIE_SIZE:
+        user_trie.start()
+    if settings.PARTITION_MAINTENANCE_INTERVAL:
+        partitions.start()
+    if settings.TIMELINE_JOB_INTERVAL:
+        timeline_jobs.start()
+    if settings.LOAD_SHED_LAG_MS:
+        loop_monitor.start()
+    replicas.start()
+    metrics.start()
+    broker.start()
+    revocations.start()
+
     try:
         yield
     finally:
+        await revocations.stop()
+        await broker.stop()
+        await metrics.stop()
+        await replicas.stop()
+        await loop_monitor.stop()
+        await timeline_jobs.stop()
+        await partitions.stop()
+        await user_trie.stop()
+        await like_buffer.stop()
         await engine.dispose()
+        await cache.client.aclose()
+        pa.shutdown()
 
 
 app = FastAPI(
@@ -27,14 +69,22 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+app.add_middleware(StickyWritesMiddleware)
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(LoadShedMiddleware)
+app.add_middleware(MetricsMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, TRUNCATED_HEADER],
 )
 
 app.include_router(auth_router)
+app.include_router(health_router)
+app.include_router(internal_router)
 app.include_router(posts_router)
+app.include_router(stream_router)
 app.include_router(users_router)
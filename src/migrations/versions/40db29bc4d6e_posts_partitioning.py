@@ -0,0 +1,157 @@
+"""Posts partitioning
+
+Revision ID: 40db29bc4d6e
+Revises: 5e1c7b3f9d20
+Create Date: 2026-10-18 19:02:44.118305
+
+"""
+from datetime import UTC, datetime
+from typing import Sequence, Union
+from uuid import UUID
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '40db29bc4d6e'
+down_revision: Union[str, Sequence[str], None] = '5e1c7b3f9d20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PREMAKE = 3
+
+
+def month_start(moment: datetime) -> datetime:
+    return moment.astimezone(UTC).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, count: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def uuid7_floor(moment: datetime) -> UUID:
+    return UUID(int=int(moment.timestamp() * 1000) << 80)
+
+
+def rename_tables(suffix: str) -> None:
+    for table in ('posts', 'likes', 'comments'):
+        op.rename_table(table, f'{table}_{suffix}')
+
+
+def create_tables(partitioned: bool) -> None:
+    def created_at() -> sa.Column:
+        if partitioned:
+            return sa.Column('created_at', sa.TIMESTAMP(timezone=True), sa.Computed('uuid_extract_timestamp(id)', persisted=True), nullable=False)
+        return sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False)
+
+    op.create_table('posts',
+    sa.Column('id', sa.Uuid(), server_default=sa.text('uuidv7()'), nullable=False),
+    sa.Column('body', sqlmodel.sql.sqltypes.AutoString(length=2000), nullable=False),
+    created_at(),
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('like_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('comment_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed("to_tsvector('english', body)", persisted=True), nullable=True),
+    postgresql_partition_by='RANGE (id)' if partitioned else None,
+    )
+    op.create_table('likes',
+    sa.Column('post_id', sa.Uuid(), nullable=False),
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    postgresql_partition_by='RANGE (post_id)' if partitioned else None,
+    )
+    op.create_table('comments',
+    sa.Column('id', sa.Uuid(), server_default=sa.text('uuidv7()'), nullable=False),
+    sa.Column('body', sqlmodel.sql.sqltypes.AutoString(length=500), nullable=False),
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('post_id', sa.Uuid(), nullable=False),
+    created_at(),
+    postgresql_partition_by='RANGE (post_id)' if partitioned else None,
+    )
+
+
+def create_constraints(partitioned: bool) -> None:
+    op.create_primary_key('posts_pkey', 'posts', ['id'])
+    op.create_foreign_key('posts_user_id_fkey', 'posts', 'users', ['user_id'], ['id'], ondelete='CASCADE')
+    op.create_index('ix_posts_created_at_id', 'posts', ['created_at', 'id'], unique=False)
+    op.create_index('ix_posts_user_id_created_at_id', 'posts', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_posts_search_vector', 'posts', ['search_vector'], unique=False, postgresql_using='gin')
+
+    op.create_primary_key('likes_pkey', 'likes', ['post_id', 'user_id'])
+    op.create_foreign_key('likes_post_id_fkey', 'likes', 'posts', ['post_id'], ['id'], ondelete='CASCADE')
+    op.create_foreign_key('likes_user_id_fkey', 'likes', 'users', ['user_id'], ['id'], ondelete='CASCADE')
+    op.create_index(op.f('ix_likes_user_id'), 'likes', ['user_id'], unique=False)
+
+    op.create_primary_key('comments_pkey', 'comments', ['id', 'post_id'] if partitioned else ['id'])
+    op.create_foreign_key('comments_post_id_fkey', 'comments', 'posts', ['post_id'], ['id'], ondelete='CASCADE')
+    op.create_foreign_key('comments_user_id_fkey', 'comments', 'users', ['user_id'], ['id'], ondelete='CASCADE')
+    op.create_index(op.f('ix_comments_user_id'), 'comments', ['user_id'], unique=False)
+    op.create_index('ix_comments_post_id_created_at_id', 'comments', ['post_id', 'created_at', 'id'], unique=False)
+
+    op.create_foreign_key('timeline_entries_post_id_fkey', 'timeline_entries', 'posts', ['post_id'], ['id'], ondelete='CASCADE')
+
+
+def drop_tables(suffix: str) -> None:
+    for table in ('comments', 'likes', 'posts'):
+        op.execute(f'DROP TABLE {table}_{suffix} CASCADE')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE SCHEMA IF NOT EXISTS archive')
+    rename_tables('unpartitioned')
+    create_tables(partitioned=True)
+
+    now = datetime.now(UTC)
+    oldest = op.get_bind().execute(
+        sa.text('SELECT min(uuid_extract_timestamp(id)) FROM posts_unpartitioned')
+    ).scalar()
+    month = month_start(oldest or now)
+    while month < add_months(month_start(now), PREMAKE + 1):
+        lower, upper = uuid7_floor(month), uuid7_floor(add_months(month, 1))
+        for table in ('posts', 'likes', 'comments'):
+            op.execute(
+                f"CREATE TABLE {table}_p{month:%Y%m} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+            )
+        month = add_months(month, 1)
+
+    op.execute(
+        """
+        INSERT INTO posts (id, body, user_id, like_count, comment_count)
+        SELECT id, body, user_id, like_count, comment_count FROM posts_unpartitioned
+        """
+    )
+    op.execute('INSERT INTO likes (post_id, user_id) SELECT post_id, user_id FROM likes_unpartitioned')
+    op.execute(
+        """
+        INSERT INTO comments (id, body, user_id, post_id)
+        SELECT id, body, user_id, post_id FROM comments_unpartitioned
+        """
+    )
+    drop_tables('unpartitioned')
+    create_constraints(partitioned=True)
+    op.execute('ANALYZE posts, likes, comments')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    rename_tables('partitioned')
+    create_tables(partitioned=False)
+    op.execute(
+        """
+        INSERT INTO posts (id, body, created_at, user_id, like_count, comment_count)
+        SELECT id, body, created_at, user_id, like_count, comment_count FROM posts_partitioned
+        """
+    )
+    op.execute('INSERT INTO likes (post_id, user_id) SELECT post_id, user_id FROM likes_partitioned')
+    op.execute(
+        """
+        INSERT INTO comments (id, body, user_id, post_id, created_at)
+        SELECT id, body, user_id, post_id, created_at FROM comments_partitioned
+        """
+    )
+    drop_tables('partitioned')
+    create_constraints(partitioned=False)
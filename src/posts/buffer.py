@@ -0,0 +1,194 @@
+import asyncio
+import logging
+import time
+from contextlib import suppress
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import Uuid
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import delete, func, literal, select, update
+
+from src.config.cache import Cache, cache
+from src.config.db import session
+from src.config.settings import settings
+from src.posts.models import Like, Post
+from src.posts.schemas import PostRead
+from src.users.models import User
+
+logger = logging.getLogger(__name__)
+
+
+class LikeBuffer:
+    def __init__(self, interval: float, size: int) -> None:
+        self.interval = interval
+        self.size = size
+        self.pending: dict[tuple[UUID, UUID], bool] = {}
+        self.lock = asyncio.Lock()
+        self.wakeup = asyncio.Event()
+        self.task: asyncio.Task | None = None
+        self.closed = True
+        self.flushes = 0
+        self.failures = 0
+        self.flushed = 0
+        self.flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+
+    def add(self, user_id: UUID, post_id: UUID, is_liked: bool) -> None:
+        self.pending[user_id, post_id] = is_liked
+        if len(self.pending) >= self.size:
+            self.wakeup.set()
+
+    def get(self, user_id: UUID, post_id: UUID) -> bool | None:
+        return self.pending.get((user_id, post_id))
+
+    # pending likes live in this process and are only merged for their own user:
+    # counts are read-your-writes, other users see them after the next flush
+    def adjust(
+        self, user_id: UUID, post_id: UUID, total_likes: int, is_liked: bool
+    ) -> tuple[int, bool]:
+        pending = self.get(user_id, post_id)
+
+        if pending is None or pending == is_liked:
+            return total_likes, is_liked
+
+        return total_likes + (1 if pending else -1), pending
+
+    def merge(self, user_id: UUID, post: PostRead) -> PostRead:
+        post.total_likes, post.is_liked = self.adjust(
+            user_id, post.id, post.total_likes, post.is_liked
+        )
+        return post
+
+    async def flush(self, session: AsyncSession, cache: Cache) -> int:
+        async with self.lock:
+            batch, self.pending = self.pending, {}
+            if not batch:
+                return 0
+
+            start = time.perf_counter()
+            try:
+                posts = await self.write(session, batch)
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                self.failures += 1
+                self.pending = batch | self.pending
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                self.flush_seconds += elapsed
+                self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+
+            self.flushes += 1
+            self.flushed += len(batch)
+
+        await cache.invalidate(*(f"post:{id}" for id in posts))
+        return len(batch)
+
+    async def write(
+        self, session: AsyncSession, batch: dict[tuple[UUID, UUID], bool]
+    ) -> set[UUID]:
+        posts = set()
+
+        for is_liked in (True, False):
+            pairs = [key for key, value in batch.items() if value is is_liked]
+            if not pairs:
+                continue
+
+            rows = (
+                func.unnest(
+                    literal([user_id for user_id, _ in pairs], ARRAY(Uuid)),
+                    literal([post_id for _, post_id in pairs], ARRAY(Uuid)),
+                )
+                .table_valued("user_id", "post_id")
+                .render_derived()
+            )
+
+            if is_liked:
+                changed = (
+                    insert(Like)
+                    .from_select(
+                        ["user_id", "post_id"],
+                        select(rows.c.user_id, rows.c.post_id)
+                        .join(Post, Post.id == rows.c.post_id)  # ty: ignore
+                        .join(User, User.id == rows.c.user_id),  # ty: ignore
+                    )
+                    .on_conflict_do_nothing()
+                    .returning(Like.post_id)  # ty: ignore
+                    .cte("changed")
+                )
+            else:
+                changed = (
+                    delete(Like)
+                    .where(
+                        Like.user_id == rows.c.user_id,  # ty: ignore
+                        Like.post_id == rows.c.post_id,  # ty: ignore
+                    )
+                    .returning(Like.post_id)  # ty: ignore
+                    .cte("changed")
+                )
+
+            counts = (
+                select(changed.c.post_id, func.count().label("total"))
+                .group_by(changed.c.post_id)
+                .subquery()
+            )
+            statement = (
+                update(Post)
+                .where(Post.id == counts.c.post_id)  # ty: ignore
+                .values(
+                    like_count=Post.like_count
+                    + (counts.c.total if is_liked else -counts.c.total),
+                    version=Post.version + 1,
+                )
+                .returning(Post.id)  # ty: ignore
+                .add_cte(changed)
+                .execution_options(synchronize_session=False)
+            )
+            result = await session.execute(statement)
+            posts.update(result.scalars().all())
+
+        return posts
+
+    async def run(self) -> None:
+        while not self.closed:
+            with suppress(TimeoutError):
+                await asyncio.wait_for(self.wakeup.wait(), self.interval)
+            self.wakeup.clear()
+
+            try:
+                async with session() as se:
+                    await self.flush(se, cache)
+            except Exception:
+                logger.exception("like buffer flush failed")
+
+    def start(self) -> None:
+        self.closed = False
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        self.closed = True
+        self.wakeup.set()
+
+        if self.task:
+            await self.task
+            self.task = None
+
+        async with session() as se:
+            await self.flush(se, cache)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "enabled": settings.LIKES_WRITE_BEHIND,
+            "depth": len(self.pending),
+            "flushes": self.flushes,
+            "failures": self.failures,
+            "flushed": self.flushed,
+            "flush_ms_total": round(self.flush_seconds * 1000, 3),
+            "flush_ms_max": round(self.max_flush_seconds * 1000, 3),
+        }
+
+
+like_buffer = LikeBuffer(settings.LIKES_FLUSH_INTERVAL, settings.LIKES_FLUSH_SIZE)
@@ -0,0 +1,89 @@
+import asyncio
+import sys
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import func, or_, select, update
+
+from src.config.db import engine, session
+from src.posts import timeline
+from src.posts.models import Comment, Like, Post
+from src.users.models import Follow, User
+
+
+async def reconcile(se: AsyncSession, model, counters: dict, batch_size: int) -> int:
+    updated = 0
+    last_id = None
+
+    while True:
+        statement = select(model.id).order_by(model.id).limit(batch_size)
+        if last_id:
+            statement = statement.where(model.id > last_id)
+
+        ids = (await se.execute(statement)).scalars().all()
+        if not ids:
+            break
+
+        statement = (
+            update(model)
+            .where(
+                model.id.in_(ids),
+                or_(*(getattr(model, key) != value for key, value in counters.items())),
+            )
+            .values({**counters, "version": model.version + 1})
+            .execution_options(synchronize_session=False)
+        )
+        result = await se.execute(statement)
+        await se.commit()
+
+        updated += result.rowcount  # ty: ignore
+        last_id = ids[-1]
+
+    return updated
+
+
+async def reconcile_counters(se: AsyncSession, batch_size: int = 1000) -> int:
+    posts = await reconcile(
+        se,
+        Post,
+        {
+            "like_count": select(func.count())
+            .where(Like.post_id == Post.id)
+            .correlate(Post)
+            .scalar_subquery(),
+            "comment_count": select(func.count())
+            .where(Comment.post_id == Post.id)
+            .correlate(Post)
+            .scalar_subquery(),
+        },
+        batch_size,
+    )
+    users = await reconcile(
+        se,
+        User,
+        {
+            "follower_count": select(func.count())
+            .where(Follow.following_id == User.id)
+            .correlate(User)
+            .scalar_subquery(),
+        },
+        batch_size,
+    )
+    return posts + users
+
+
+commands = {
+    "reconcile": reconcile_counters,
+    "trim-timelines": timeline.trim,
+}
+
+
+async def main(name: str) -> None:
+    try:
+        async with session() as se:
+            print(f"{name}: {await commands[name](se)} rows")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1]))
@@ -2,7 +2,9 @@ from datetime import datetime
 from typing import TYPE_CHECKING
 from uuid import UUID, uuid7
 
-from sqlmodel import TIMESTAMP, Field, Relationship, SQLModel, func
+from sqlalchemy import Column, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlmodel import TIMESTAMP, Field, Index, Relationship, SQLModel, func
 
 if TYPE_CHECKING:
     from src.users.models import User
@@ -10,6 +12,10 @@ if TYPE_CHECKING:
 
 class Comment(SQLModel, table=True):
     __tablename__ = "comments"
+    __table_args__ = (
+        Index("ix_comments_post_id_created_at_id", "post_id", "created_at", "id"),
+        {"postgresql_partition_by": "RANGE (post_id)"},
+    )
 
     id: UUID = Field(
         default_factory=uuid7,
@@ -18,10 +24,10 @@ class Comment(SQLModel, table=True):
     )
     body: str = Field(min_length=1, max_length=500)
     user_id: UUID = Field(foreign_key="users.id", ondelete="CASCADE", index=True)
-    post_id: UUID = Field(foreign_key="posts.id", ondelete="CASCADE", index=True)
+    post_id: UUID = Field(primary_key=True, foreign_key="posts.id", ondelete="CASCADE")
     created_at: datetime = Field(
         sa_type=TIMESTAMP(timezone=True),  # ty: ignore
-        sa_column_kwargs={"server_default": func.current_timestamp()},
+        sa_column_args=[Computed("uuid_extract_timestamp(id)", persisted=True)],
     )
     user: "User" = Relationship(  # noqa: UP037
         back_populates="comments", sa_relationship_kwargs={"lazy": "selectin"}
@@ -30,6 +36,7 @@ class Comment(SQLModel, table=True):
 
 class Like(SQLModel, table=True):
     __tablename__ = "likes"
+    __table_args__ = ({"postgresql_partition_by": "RANGE (post_id)"},)
 
     post_id: UUID = Field(primary_key=True, foreign_key="posts.id", ondelete="CASCADE")
     user_id: UUID = Field(
@@ -39,6 +46,13 @@ class Like(SQLModel, table=True):
 
 class Post(SQLModel, table=True):
     __tablename__ = "posts"
+    __table_args__ = (
+        Index("ix_posts_created_at_id", "created_at", "id"),
+        Index("ix_posts_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_posts_search_vector", "search_vector", postgresql_using="gin"),
+        {"postgresql_partition_by": "RANGE (id)"},
+    )
+    __mapper_args__ = {"exclude_properties": ["search_vector"]}
 
     id: UUID = Field(
         default_factory=uuid7,
@@ -48,9 +62,19 @@ class Post(SQLModel, table=True):
     body: str = Field(min_length=1, max_length=2000)
     created_at: datetime = Field(
         sa_type=TIMESTAMP(timezone=True),  # ty: ignore
-        sa_column_kwargs={"server_default": func.current_timestamp()},
+        sa_column_args=[Computed("uuid_extract_timestamp(id)", persisted=True)],
+    )
+    user_id: UUID = Field(foreign_key="users.id", ondelete="CASCADE")
+    like_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    comment_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})
+    search_vector: str | None = Field(
+        default=None,
+        exclude=True,
+        sa_column=Column(
+            TSVECTOR, Computed("to_tsvector('english', body)", persisted=True)
+        ),
     )
-    user_id: UUID = Field(foreign_key="users.id", ondelete="CASCADE", index=True)
     user: "User" = Relationship(  # noqa: UP037
         back_populates="posts", sa_relationship_kwargs={"lazy": "selectin"}
     )
@@ -58,3 +82,20 @@ class Post(SQLModel, table=True):
         back_populates="likes",
         link_model=Like,
     )
+
+
+class TimelineEntry(SQLModel, table=True):
+    __tablename__ = "timeline_entries"
+    __table_args__ = (
+        Index("ix_timeline_entries_user_id_author_id", "user_id", "author_id"),
+    )
+
+    user_id: UUID = Field(primary_key=True, foreign_key="users.id", ondelete="CASCADE")
+    created_at: datetime = Field(
+        primary_key=True,
+        sa_type=TIMESTAMP(timezone=True),  # ty: ignore
+    )
+    post_id: UUID = Field(
+        primary_key=True, foreign_key="posts.id", ondelete="CASCADE", index=True
+    )
+    author_id: UUID = Field(foreign_key="users.id", ondelete="CASCADE")
@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import time
+from contextlib import suppress
+from datetime import UTC, datetime
+from typing import Any
+from uuid import UUID, uuid7
+
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from sqlmodel import delete, text
+
+from src.config.db import engine
+from src.config.settings import settings
+from src.posts.models import TimelineEntry
+
+logger = logging.getLogger(__name__)
+
+TABLES = ("posts", "likes", "comments")
+LOCK_KEY = 7_340_112
+
+
+def month_start(moment: datetime) -> datetime:
+    return moment.astimezone(UTC).replace(
+        day=1, hour=0, minute=0, second=0, microsecond=0
+    )
+
+
+def add_months(month: datetime, count: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def uuid7_floor(moment: datetime) -> UUID:
+    return UUID(int=int(moment.timestamp() * 1000) << 80)
+
+
+def uuid7_at(moment: datetime) -> UUID:
+    return UUID(int=uuid7_floor(moment).int | uuid7().int & ((1 << 80) - 1))
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+class Partitions:
+    def __init__(
+        self, premake: int, retention: int, schema: str, interval: float
+    ) -> None:
+        self.premake = premake
+        self.retention = retention
+        self.schema = schema
+        self.interval = interval
+        self.created = 0
+        self.archived = 0
+        self.last_run: float | None = None
+        self.task: asyncio.Task | None = None
+
+    async def partitions_of(
+        self, conn: AsyncConnection | AsyncSession, table: str
+    ) -> dict[str, bool]:
+        result = await conn.execute(
+            text(
+                """
+                SELECT child.relname, inherits.inhdetachpending
+                FROM pg_inherits AS inherits
+                JOIN pg_class AS child ON child.oid = inherits.inhrelid
+                WHERE inherits.inhparent = CAST(:table AS regclass)
+                """
+            ),
+            {"table": table},
+        )
+        return dict(result.all())
+
+    async def ensure(
+        self, conn: AsyncConnection | AsyncSession, start: datetime, end: datetime
+    ) -> None:
+        month = month_start(start)
+
+        while month < end:
+            lower, upper = uuid7_floor(month), uuid7_floor(add_months(month, 1))
+            for table in TABLES:
+                name = partition_name(table, month)
+                if name in await self.partitions_of(conn, table):
+                    continue
+
+                await conn.execute(
+                    text(
+                        f"CREATE TABLE {name} PARTITION OF {table} "
+                        f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+                    )
+                )
+                self.created += 1
+                logger.info("created partition %s", name)
+
+            month = add_months(month, 1)
+
+    async def archive(self, conn: AsyncConnection, month: datetime) -> None:
+        lower, upper = uuid7_floor(month), uuid7_floor(add_months(month, 1))
+        await conn.execute(
+            delete(TimelineEntry).where(
+                TimelineEntry.post_id >= lower,  # ty: ignore
+                TimelineEntry.post_id < upper,  # ty: ignore
+            )
+        )
+
+        for table in reversed(TABLES):
+            name = partition_name(table, month)
+            pending = (await self.partitions_of(conn, table)).get(name)
+
+            if pending is not None:
+                mode = "FINALIZE" if pending else "CONCURRENTLY"
+                await conn.execute(
+                    text(f"ALTER TABLE {table} DETACH PARTITION {name} {mode}")
+                )
+
+            if await conn.scalar(text("SELECT to_regclass(:name)"), {"name": name}):
+                constraints = await conn.execute(
+                    text(
+                        """
+                        SELECT conname FROM pg_constraint
+                        WHERE conrelid = CAST(:name AS regclass)
+                        AND confrelid = CAST('posts' AS regclass)
+                        AND conparentid = 0
+                        """
+                    ),
+                    {"name": name},
+                )
+                for constraint in constraints.scalars().all():
+                    await conn.execute(
+                        text(f'ALTER TABLE {name} DROP CONSTRAINT "{constraint}"')
+                    )
+                await conn.execute(text(f"ALTER TABLE {name} SET SCHEMA {self.schema}"))
+
+        self.archived += 1
+        logger.info("archived partitions for %s", f"{month:%Y-%m}")
+
+    async def maintain(self) -> None:
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+
+            if not await conn.scalar(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": LOCK_KEY}
+            ):
+                return
+
+            try:
+                current = month_start(datetime.now(UTC))
+                await self.ensure(conn, current, add_months(current, self.premake + 1))
+
+                if self.retention:
+                    cutoff = add_months(current, -self.retention)
+                    for name in sorted(await self.partitions_of(conn, "posts")):
+                        month = datetime.strptime(name[-6:], "%Y%m").replace(tzinfo=UTC)
+                        if month < cutoff:
+                            await self.archive(conn, month)
+            finally:
+                await conn.execute(
+                    text("SELECT pg_advisory_unlock(:key)"), {"key": LOCK_KEY}
+                )
+
+        self.last_run = time.time()
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.maintain()
+            except Exception:
+                logger.exception("partition maintenance failed")
+
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self.task:
+            self.task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.task
+            self.task = None
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "premake": self.premake,
+            "retention": self.retention,
+            "created": self.created,
+            "archived": self.archived,
+            "last_run": self.last_run,
+        }
+
+
+partitions = Partitions(
+    settings.PARTITION_PREMAKE,
+    settings.PARTITION_RETENTION,
+    settings.PARTITION_ARCHIVE_SCHEMA,
+    settings.PARTITION_MAINTENANCE_INTERVAL,
+)
@@ -1,22 +1,105 @@
+from datetime import datetime
+from typing import Any
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Query, status
-from sqlmodel import desc, exists, func, select
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from pydantic import TypeAdapter
+from sqlalchemy import Uuid, any_
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import delete, desc, exists, func, literal, select, tuple_, update
 
 from src.config.auth import auth_dep
-from src.config.db import session_dep
+from src.config.cache import cache_dep
+from src.config.db import (
+    is_foreign_key_violation,
+    is_missing_partition,
+    session_dep,
+)
+from src.config.limits import limit_by_user
+from src.config.pagination import (
+    NEXT_CURSOR_HEADER,
+    TRUNCATED_HEADER,
+    decode_cursor,
+    decode_rank_cursor,
+    encode_cursor,
+    encode_rank_cursor,
+)
+from src.config.replicas import read_session_dep
+from src.config.responses import (
+    is_not_modified,
+    json_response,
+    make_etag,
+    not_modified,
+)
+from src.config.settings import settings
+from src.posts import timeline
+from src.posts.buffer import like_buffer
 from src.posts.models import Comment, Like, Post
 from src.posts.schemas import (
     CommentCreate,
     CommentRead,
+    PostBase,
+    PostBatchGet,
+    PostBatchRead,
     PostCreate,
     PostRead,
+    PostSearchRead,
     PostUpdate,
 )
-from src.users.models import Follow
+from src.stream.broker import broker
+from src.users.models import User
+from src.users.schemas import UserRead
 
 posts_router = APIRouter(prefix="/api/v1/posts", tags=["posts"])
 
+post_adapter = TypeAdapter(tuple[PostBase, int, int])
+comments_adapter = TypeAdapter(list[CommentRead])
+
+COMMENTS_PAGE_SIZE = 100
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
+
+def is_liked_by(user_id: UUID):
+    return (
+        exists()
+        .where(Like.user_id == user_id, Like.post_id == Post.id)  # ty: ignore
+        .correlate(Post)
+        .label("is_liked")
+    )
+
+
+def select_posts(user_id: UUID):
+    return select(
+        Post.id,
+        Post.body,
+        Post.created_at,
+        Post.like_count,
+        Post.comment_count,
+        User.id,
+        User.username,
+        User.created_at,
+        is_liked_by(user_id),
+    ).join(User, User.id == Post.user_id)  # ty: ignore
+
+
+def to_user(values) -> dict[str, Any]:
+    return dict(zip(("id", "username", "created_at"), values, strict=True))
+
+
+def to_post(row) -> dict[str, Any]:
+    id, body, created_at, likes, comments, *user, is_liked = row[:9]
+    return {
+        "id": id,
+        "body": body,
+        "created_at": created_at,
+        "user": to_user(user),
+        "total_likes": likes,
+        "total_comments": comments,
+        "is_liked": is_liked,
+    }
+
 
 @posts_router.post("", response_model=PostRead)
 async def create_post(
@@ -24,14 +107,18 @@ async def create_post(
 ) -> PostRead:
     row = Post(body=payload.body, user_id=user_id)
     session.add(row)
+    await session.flush()
+    await timeline.fan_out(session, row.id)
     await session.commit()
     await session.refresh(row)
+    await broker.publish("post", post_id=row.id, author_id=user_id)
     return PostRead(
         id=row.id,
         body=row.body,
         created_at=row.created_at,
         user=row.user,  # ty: ignore
         total_likes=0,
+        total_comments=0,
         is_liked=False,
     )
 
@@ -39,90 +126,212 @@ async def create_post(
 @posts_router.get("", response_model=list[PostRead])
 async def get_posts(
     user_id: auth_dep,
-    session: session_dep,
+    session: read_session_dep,
     id: UUID = Query(default=None),  # noqa
     feed: bool = Query(default=False),
+    cursor: str | None = Query(default=None),
     offset: int = Query(default=0, ge=0),
     limit: int = Query(default=20, ge=1, le=100),
-) -> list[PostRead]:
+) -> Response:
 
     if id and feed:
         raise HTTPException(status.HTTP_400_BAD_REQUEST)
 
-    statement = select(
-        Post,
-        func.count(Like.post_id).label("total_likes"),  # ty: ignore
-        exists()
-        .where(Like.user_id == user_id, Like.post_id == Post.id)  # ty: ignore
-        .correlate(Post)
-        .label("is_liked"),
-    )
+    if cursor and offset:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST)
+
+    after = decode_cursor(cursor) if cursor else None
+
+    statement = select_posts(user_id)
     if id:
         statement = statement.where(Post.user_id == id)
 
     if feed:
-        statement = statement.join(Follow, Post.user_id == Follow.following_id).where(  # ty: ignore
-            Follow.follower_id == user_id
+        entries = timeline.entries(user_id, after, offset + limit)
+        statement = statement.join(entries, entries.c.post_id == Post.id)
+
+    if after:
+        statement = statement.where(
+            tuple_(Post.created_at, Post.id) < tuple_(*after), Post.id < after[1]
         )
 
     statement = (
-        statement.outerjoin(Like)
-        .group_by(Post.id)  # ty: ignore
-        .order_by(desc(Post.created_at))
+        statement.order_by(desc(Post.created_at), desc(Post.id))
         .offset(offset)
         .limit(limit)
     )
     result = await session.execute(statement)
     rows = result.all()
 
+    content = []
+    for row in rows:
+        post = to_post(row)
+        post["total_likes"], post["is_liked"] = like_buffer.adjust(
+            user_id, post["id"], post["total_likes"], post["is_liked"]
+        )
+        content.append(post)
+
+    headers = {}
+    if len(rows) == limit:
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1][2], rows[-1][0])
+
+    return json_response(content, headers)
+
+
+@posts_router.get("/search", response_model=list[PostSearchRead])
+async def search(
+    user_id: auth_dep,
+    session: read_session_dep,
+    response: Response,
+    q: str = Query(min_length=1, max_length=200),
+    cursor: str | None = Query(default=None),
+    limit: int = Query(default=20, ge=1, le=100),
+) -> list[PostSearchRead]:
+    query = func.websearch_to_tsquery("english", q)
+    matches = select(Post.id).where(Post.search_vector.op("@@")(query))  # ty: ignore
+    candidates = (
+        matches.order_by(desc(Post.created_at), desc(Post.id))
+        .limit(settings.POST_SEARCH_CANDIDATES)
+        .subquery()
+    )
+    rank = func.ts_rank_cd(Post.search_vector, query).label("rank")
+    body = func.replace(
+        func.replace(func.replace(Post.body, "&", "&amp;"), "<", "&lt;"), ">", "&gt;"
+    )
+    snippet = func.ts_headline(
+        "english",
+        body,
+        query,
+        "StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15",
+    ).label("snippet")
+
+    # only the newest candidates are ranked, so flag any matches past them
+    truncated = exists(matches.offset(settings.POST_SEARCH_CANDIDATES).limit(1)).label(
+        "truncated"
+    )
+
+    statement = (
+        select_posts(user_id)
+        .add_columns(rank, snippet, truncated)
+        .join(candidates, candidates.c.id == Post.id)
+    )
+
+    if cursor:
+        after, key = decode_rank_cursor(cursor)
+        try:
+            id = UUID(key)
+        except ValueError:
+            raise HTTPException(status.HTTP_400_BAD_REQUEST) from None
+        statement = statement.where(tuple_(rank, Post.id) < tuple_(after, id))
+
+    statement = statement.order_by(desc(rank), desc(Post.id)).limit(limit)
+    result = await session.execute(statement)
+    rows = result.all()
+
+    if len(rows) == limit:
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_rank_cursor(
+            last.rank, str(last[0])
+        )
+
+    if rows and rows[0].truncated:
+        response.headers[TRUNCATED_HEADER] = "true"
+
     return [
-        PostRead(
-            id=row.id,
-            body=row.body,
-            created_at=row.created_at,
-            user=row.user,
-            total_likes=total_likes,
-            is_liked=is_liked,
+        PostSearchRead(
+            **like_buffer.merge(user_id, PostRead(**to_post(row))).model_dump(),
+            snippet=row.snippet,
         )
-        for row, total_likes, is_liked in rows
+        for row in rows
     ]
 
 
+@posts_router.post(":batchGet", response_model=PostBatchRead)
+async def batch_get_posts(
+    payload: PostBatchGet, user_id: auth_dep, session: session_dep
+) -> PostBatchRead:
+    statement = select_posts(user_id).where(
+        Post.id == any_(literal(payload.ids, ARRAY(Uuid)))
+    )
+    result = await session.execute(statement)
+    rows = {
+        row[0]: like_buffer.merge(user_id, PostRead(**to_post(row)))
+        for row in result.all()
+    }
+
+    return PostBatchRead(
+        posts=[rows.get(id) for id in payload.ids],
+        missing=list(dict.fromkeys(id for id in payload.ids if id not in rows)),
+    )
+
+
 @posts_router.get("/{id}", response_model=PostRead)
-async def get_post(id: UUID, user_id: auth_dep, session: session_dep) -> PostRead:
-    statement = (
-        select(
-            Post,
-            func.count(Like.post_id).label("total_likes"),  # ty: ignore
-            exists()
-            .where(Like.user_id == user_id, Like.post_id == Post.id)  # ty: ignore
-            .correlate(Post)
-            .label("is_liked"),
+async def get_post(
+    id: UUID,
+    user_id: auth_dep,
+    session: read_session_dep,
+    primary: session_dep,
+    cache: cache_dep,
+    request: Request,
+    response: Response,
+) -> PostRead | Response:
+    is_liked = None
+
+    async def load() -> tuple[PostBase, int, int] | None:
+        nonlocal is_liked
+        statement = (
+            select_posts(user_id)
+            .add_columns(
+                Post.version.label("post_version"),  # ty: ignore
+                User.version.label("user_version"),  # ty: ignore
+            )
+            .where(Post.id == id)
         )
-        .outerjoin(Like)
-        .where(Post.id == id)
-        .group_by(Post.id)  # ty: ignore
+        result = await primary.execute(statement)
+        row = result.first()
+
+        if not row:
+            return None
+
+        post = to_post(row)
+        is_liked = post.pop("is_liked")
+        return PostBase(**post), row.post_version, row.user_version
+
+    cached = await cache.fetch(
+        f"post:{id}", post_adapter, load, settings.CACHE_POST_TTL
     )
-    result = await session.execute(statement)
-    row = result.one_or_none()
 
-    if not row:
+    if not cached:
         raise HTTPException(status.HTTP_404_NOT_FOUND)
 
-    row, total_likes, is_liked = row
-    return PostRead(
-        id=row.id,
-        body=row.body,
-        created_at=row.created_at,
-        user=row.user,
-        total_likes=total_likes,
-        is_liked=is_liked,
-    )
+    post, version, user_version = cached
+
+    if is_liked is None:
+        statement = select(exists().where(Like.user_id == user_id, Like.post_id == id))  # ty: ignore
+        result = await session.execute(statement)
+        is_liked = bool(result.scalar())
+
+    headers = {
+        "ETag": make_etag(
+            id, version, user_version, is_liked, like_buffer.get(user_id, id)
+        ),
+        "Cache-Control": PRIVATE_CACHE_CONTROL,
+    }
+
+    if is_not_modified(request, headers["ETag"]):
+        return not_modified(headers)
+
+    response.headers.update(headers)
+    return like_buffer.merge(user_id, PostRead(**post.model_dump(), is_liked=is_liked))
 
 
 @posts_router.patch("/{id}", response_model=PostRead)
 async def update_post(
-    id: UUID, payload: PostUpdate, user_id: auth_dep, session: session_dep
+    id: UUID,
+    payload: PostUpdate,
+    user_id: auth_dep,
+    session: session_dep,
+    cache: cache_dep,
 ) -> PostRead:
     statement = select(Post).where(Post.id == id)
     result = await session.execute(statement)
@@ -138,41 +347,24 @@ async def update_post(
         if hasattr(row, key):
             setattr(row, key, value)
 
+    row.version = Post.version + 1
     await session.commit()
+    await cache.invalidate(f"post:{id}")
 
-    statement = (
-        select(
-            Post,
-            func.count(Like.post_id).label("total_likes"),  # ty: ignore
-            exists()
-            .where(Like.user_id == user_id, Like.post_id == Post.id)  # ty: ignore
-            .correlate(Post)
-            .label("is_liked"),
-        )
-        .outerjoin(Like)
-        .where(Post.id == id)
-        .group_by(Post.id)  # ty: ignore
-    )
+    statement = select_posts(user_id).where(Post.id == id)
     result = await session.execute(statement)
-    row = result.one_or_none()
+    row = result.first()
 
     if not row:
         raise HTTPException(status.HTTP_404_NOT_FOUND)
 
-    row, total_likes, is_liked = row
-
-    return PostRead(
-        id=row.id,
-        body=row.body,
-        created_at=row.created_at,
-        user=row.user,
-        total_likes=total_likes,
-        is_liked=is_liked,
-    )
+    return like_buffer.merge(user_id, PostRead(**to_post(row)))
 
 
 @posts_router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_post(id: UUID, user_id: auth_dep, session: session_dep) -> None:
+async def delete_post(
+    id: UUID, user_id: auth_dep, session: session_dep, cache: cache_dep
+) -> None:
     statement = select(Post).where(Post.id == id)
     result = await session.execute(statement)
     row = result.scalar()
@@ -185,35 +377,126 @@ async def delete_post(id: UUID, user_id: auth_dep, session: session_dep) -> None
 
     await session.delete(row)
     await session.commit()
+    await cache.invalidate(f"post:{id}", f"comments:{id}")
 
 
-@posts_router.post("/{id}/like")
-async def like(id: UUID, user_id: auth_dep, session: session_dep) -> dict[str, bool]:
-    statement = select(Post).where(Post.id == id)
-    result = await session.execute(statement)
-    row = result.scalar()
+async def add_like(session: AsyncSession, user_id: UUID, id: UUID) -> bool:
+    inserted = (
+        insert(Like)
+        .values(user_id=user_id, post_id=id)
+        .on_conflict_do_nothing()
+        .returning(Like.post_id)  # ty: ignore
+        .cte("inserted")
+    )
+    statement = (
+        update(Post)
+        .where(Post.id.in_(select(inserted.c.post_id)))  # ty: ignore
+        .values(like_count=Post.like_count + 1, version=Post.version + 1)
+        .returning(Post.id)  # ty: ignore
+        .add_cte(inserted)
+        .execution_options(synchronize_session=False)
+    )
 
-    if not row:
-        raise HTTPException(status.HTTP_404_NOT_FOUND)
+    try:
+        result = await session.execute(statement)
+    except IntegrityError as e:
+        await session.rollback()
+        if is_foreign_key_violation(e) or is_missing_partition(e):
+            raise HTTPException(status.HTTP_404_NOT_FOUND) from None
+        raise
+
+    return result.first() is not None
 
-    statement = select(Like).where(Like.user_id == user_id, Like.post_id == id)
+
+async def remove_like(session: AsyncSession, user_id: UUID, id: UUID) -> bool:
+    deleted = (
+        delete(Like)
+        .where(Like.user_id == user_id, Like.post_id == id)  # ty: ignore
+        .returning(Like.post_id)  # ty: ignore
+        .cte("deleted")
+    )
+    statement = (
+        update(Post)
+        .where(Post.id.in_(select(deleted.c.post_id)))  # ty: ignore
+        .values(like_count=Post.like_count - 1, version=Post.version + 1)
+        .returning(Post.id)  # ty: ignore
+        .add_cte(deleted)
+        .execution_options(synchronize_session=False)
+    )
     result = await session.execute(statement)
-    row = result.scalar()
+    return result.first() is not None
+
+
+@posts_router.put("/{id}/like", dependencies=[limit_by_user("write")])
+async def put_like(
+    id: UUID, user_id: auth_dep, session: session_dep, cache: cache_dep
+) -> dict[str, bool]:
+    if settings.LIKES_WRITE_BEHIND:
+        like_buffer.add(user_id, id, True)
+    elif await add_like(session, user_id, id):
+        await session.commit()
+        await cache.invalidate(f"post:{id}")
+    else:
+        return {"is_liked": True}
 
-    if row:
-        await session.delete(row)
-        is_liked = False
+    await broker.publish("like", post_id=id, user_id=user_id, is_liked=True)
+    return {"is_liked": True}
+
+
+@posts_router.delete("/{id}/like", dependencies=[limit_by_user("write")])
+async def delete_like(
+    id: UUID, user_id: auth_dep, session: session_dep, cache: cache_dep
+) -> dict[str, bool]:
+    if settings.LIKES_WRITE_BEHIND:
+        like_buffer.add(user_id, id, False)
+    elif await remove_like(session, user_id, id):
+        await session.commit()
+        await cache.invalidate(f"post:{id}")
     else:
-        session.add(Like(user_id=user_id, post_id=id))
-        is_liked = True
+        return {"is_liked": False}
+
+    await broker.publish("like", post_id=id, user_id=user_id, is_liked=False)
+    return {"is_liked": False}
+
+
+@posts_router.post("/{id}/like", dependencies=[limit_by_user("write")])
+async def like(
+    id: UUID, user_id: auth_dep, session: session_dep, cache: cache_dep
+) -> dict[str, bool]:
+    if settings.LIKES_WRITE_BEHIND:
+        is_liked = like_buffer.get(user_id, id)
+        if is_liked is None:
+            statement = select(
+                exists().where(Like.user_id == user_id, Like.post_id == id)  # ty: ignore
+            )
+            result = await session.execute(statement)
+            is_liked = bool(result.scalar())
+
+        is_liked = not is_liked
+        like_buffer.add(user_id, id, is_liked)
+    else:
+        is_liked = not await remove_like(session, user_id, id)
+        if is_liked:
+            await add_like(session, user_id, id)
 
-    await session.commit()
+        await session.commit()
+        await cache.invalidate(f"post:{id}")
+
+    await broker.publish("like", post_id=id, user_id=user_id, is_liked=is_liked)
     return {"is_liked": is_liked}
 
 
-@posts_router.post("/{id}/comments", response_model=CommentRead)
+@posts_router.post(
+    "/{id}/comments",
+    response_model=CommentRead,
+    dependencies=[limit_by_user("write")],
+)
 async def create_comment(
-    id: UUID, payload: CommentCreate, user_id: auth_dep, session: session_dep
+    id: UUID,
+    payload: CommentCreate,
+    user_id: auth_dep,
+    session: session_dep,
+    cache: cache_dep,
 ) -> CommentRead:
     statement = select(Post).where(Post.id == id)
     result = await session.execute(statement)
@@ -224,38 +507,122 @@ async def create_comment(
 
     row = Comment(body=payload.body, user_id=user_id, post_id=id)
     session.add(row)
+    await session.execute(
+        update(Post)
+        .where(Post.id == id)  # ty: ignore
+        .values(comment_count=Post.comment_count + 1, version=Post.version + 1)
+    )
     await session.commit()
+    await cache.invalidate(f"post:{id}", f"comments:{id}")
     await session.refresh(row)
+    await broker.publish("comment", post_id=id, comment_id=row.id, user_id=user_id)
     return row  # ty: ignore
 
 
-@posts_router.get("/{id}/comments", response_model=list[CommentRead])
-async def get_comments(
-    id: UUID, user_id: auth_dep, session: session_dep
+async def load_comments(
+    session: AsyncSession, id: UUID, after: tuple[datetime, UUID] | None, limit: int
 ) -> list[CommentRead]:
     statement = (
-        select(Comment).where(Comment.post_id == id).order_by(desc(Comment.created_at))
+        select(  # ty: ignore
+            Comment.id,
+            Comment.body,
+            Comment.created_at,
+            User.id,
+            User.username,
+            User.created_at,
+        )
+        .join(User, User.id == Comment.user_id)
+        .where(Comment.post_id == id)
+    )
+
+    if after:
+        statement = statement.where(
+            tuple_(Comment.created_at, Comment.id) < tuple_(*after)
+        )
+
+    statement = statement.order_by(desc(Comment.created_at), desc(Comment.id)).limit(
+        limit
     )
     result = await session.execute(statement)
-    rows = result.scalars().all()
-    return rows  # ty: ignore
+
+    return [
+        CommentRead(
+            id=comment_id,
+            body=body,
+            created_at=created_at,
+            user=UserRead(**to_user(user)),
+        )
+        for comment_id, body, created_at, *user in result.all()
+    ]
+
+
+@posts_router.get("/{id}/comments", response_model=list[CommentRead])
+async def get_comments(
+    id: UUID,
+    user_id: auth_dep,
+    session: read_session_dep,
+    primary: session_dep,
+    cache: cache_dep,
+    request: Request,
+    response: Response,
+    cursor: str | None = Query(default=None),
+    limit: int = Query(default=20, ge=1, le=COMMENTS_PAGE_SIZE),
+) -> list[CommentRead] | Response:
+    async def load() -> list[CommentRead]:
+        return await load_comments(primary, id, None, COMMENTS_PAGE_SIZE)
+
+    if cursor:
+        rows = await load_comments(session, id, decode_cursor(cursor), limit)
+    else:
+        rows = await cache.fetch(
+            f"comments:{id}", comments_adapter, load, settings.CACHE_COMMENTS_TTL
+        )
+        rows = rows[:limit]  # ty: ignore
+
+    # comments are never edited, so a page only changes with its ids or authors
+    headers = {
+        "ETag": make_etag(id, [(row.id, row.user.username) for row in rows]),
+        "Cache-Control": PRIVATE_CACHE_CONTROL,
+    }
+
+    if len(rows) == limit:
+        last = rows[-1]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
+
+    if is_not_modified(request, headers["ETag"]):
+        return not_modified(headers)
+
+    response.headers.update(headers)
+    return rows
 
 
 @posts_router.delete(
     "/{post_id}/comments/{comment_id}", status_code=status.HTTP_204_NO_CONTENT
 )
 async def delete_comment(
-    post_id: UUID, comment_id: UUID, user_id: auth_dep, session: session_dep
+    post_id: UUID,
+    comment_id: UUID,
+    user_id: auth_dep,
+    session: session_dep,
+    cache: cache_dep,
 ) -> None:
-    statement = select(Comment).where(Comment.id == comment_id)
+    statement = select(Comment).where(
+        Comment.post_id == post_id, Comment.id == comment_id
+    )
     result = await session.execute(statement)
     row = result.scalar()
 
-    if not row or row.post_id != post_id:
+    if not row:
         raise HTTPException(status.HTTP_404_NOT_FOUND)
 
     if row.user_id != user_id:
         raise HTTPException(status.HTTP_403_FORBIDDEN)
 
     await session.delete(row)
+    await session.execute(
+        update(Post)
+        .where(Post.id == post_id)  # ty: ignore
+        .values(comment_count=Post.comment_count - 1, version=Post.version + 1)
+    )
     await session.commit()
+    await cache.invalidate(f"post:{post_id}", f"comments:{post_id}")
@@ -25,15 +25,32 @@ class PostUpdate(SQLModel):
         return value.strip()
 
 
-class PostRead(SQLModel):
+class PostBase(SQLModel):
     id: UUID
     body: str
     created_at: datetime
     user: UserRead
     total_likes: int
+    total_comments: int
+
+
+class PostRead(PostBase):
     is_liked: bool
 
 
+class PostSearchRead(PostRead):
+    snippet: str
+
+
+class PostBatchGet(SQLModel):
+    ids: list[UUID] = Field(min_length=1, max_length=250)
+
+
+class PostBatchRead(SQLModel):
+    posts: list[PostRead | None]
+    missing: list[UUID]
+
+
 class CommentRead(SQLModel):
     id: UUID
     body: str
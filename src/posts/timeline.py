@@ -0,0 +1,284 @@
+import asyncio
+import logging
+import time
+from contextlib import suppress
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import Subquery, Uuid, true
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import delete, desc, func, literal, select, tuple_, union
+
+from src.config.cache import cache
+from src.config.db import session
+from src.config.settings import settings
+from src.posts.models import Post, TimelineEntry
+from src.users.models import Follow, User
+
+logger = logging.getLogger(__name__)
+
+columns = ["user_id", "created_at", "post_id", "author_id"]
+BACKFILL_KEY = "timeline:backfill"
+
+
+async def fan_out(session: AsyncSession, post_id: UUID) -> None:
+    statement = insert(TimelineEntry).from_select(
+        columns,
+        select(Follow.follower_id, Post.created_at, Post.id, Post.user_id)
+        .join(Follow, Follow.following_id == Post.user_id)  # ty: ignore
+        .join(User, User.id == Post.user_id)  # ty: ignore
+        .where(
+            Post.id == post_id,
+            User.follower_count <= settings.TIMELINE_FANOUT_LIMIT,
+        ),
+    )
+    await session.execute(statement)
+
+
+async def backfill(session: AsyncSession, follower_id: UUID, author_id: UUID) -> None:
+    posts = (
+        select(literal(follower_id, Uuid), Post.created_at, Post.id, Post.user_id)
+        .join(User, User.id == Post.user_id)  # ty: ignore
+        .where(
+            Post.user_id == author_id,
+            User.follower_count <= settings.TIMELINE_FANOUT_LIMIT,
+        )
+        .order_by(desc(Post.created_at), desc(Post.id))
+        .limit(settings.TIMELINE_BACKFILL)
+    )
+    statement = (
+        insert(TimelineEntry).from_select(columns, posts).on_conflict_do_nothing()
+    )
+    await session.execute(statement)
+
+
+async def backfill_followers(
+    session: AsyncSession, author_id: UUID, batch_size: int
+) -> int:
+    follower_count = await session.scalar(
+        select(User.follower_count).where(User.id == author_id)
+    )
+    await session.commit()
+
+    if follower_count is None or follower_count > settings.TIMELINE_FANOUT_LIMIT:
+        return 0
+
+    posts = (
+        select(Post.created_at, Post.id, Post.user_id)
+        .where(Post.user_id == author_id)
+        .order_by(desc(Post.created_at), desc(Post.id))
+        .limit(settings.TIMELINE_BACKFILL)
+        .subquery()
+    )
+    after = None
+    backfilled = 0
+
+    while True:
+        followers = (
+            select(Follow.follower_id)
+            .where(Follow.following_id == author_id)
+            .order_by(Follow.follower_id)  # ty: ignore
+            .limit(batch_size)
+        )
+        if after:
+            followers = followers.where(Follow.follower_id > after)
+
+        batch = (await session.scalars(followers)).all()
+        if not batch:
+            return backfilled
+
+        statement = (
+            insert(TimelineEntry)
+            .from_select(
+                columns,
+                select(Follow.follower_id, *posts.c)
+                .join(posts, true())
+                .where(
+                    Follow.following_id == author_id,
+                    Follow.follower_id.in_(batch),  # ty: ignore
+                ),
+            )
+            .on_conflict_do_nothing()
+        )
+        await session.execute(statement)
+        await session.commit()
+        backfilled += len(batch)
+        after = batch[-1]
+
+
+async def remove(session: AsyncSession, follower_id: UUID, author_id: UUID) -> None:
+    statement = delete(TimelineEntry).where(
+        TimelineEntry.user_id == follower_id,  # ty: ignore
+        TimelineEntry.author_id == author_id,  # ty: ignore
+    )
+    await session.execute(statement)
+
+
+def entries(user_id: UUID, after: tuple[datetime, UUID] | None, size: int) -> Subquery:
+    pushed = select(TimelineEntry.post_id).where(TimelineEntry.user_id == user_id)
+
+    celebrities = (
+        select(Follow.following_id)
+        .join(User, User.id == Follow.following_id)  # ty: ignore
+        .where(
+            Follow.follower_id == user_id,
+            User.follower_count > settings.TIMELINE_FANOUT_LIMIT,
+        )
+    )
+    pulled = select(Post.id).where(Post.user_id.in_(celebrities))  # ty: ignore
+
+    if after:
+        pushed = pushed.where(
+            tuple_(TimelineEntry.created_at, TimelineEntry.post_id) < tuple_(*after)
+        )
+        pulled = pulled.where(
+            tuple_(Post.created_at, Post.id) < tuple_(*after), Post.id < after[1]
+        )
+
+    pushed = pushed.order_by(
+        desc(TimelineEntry.created_at), desc(TimelineEntry.post_id)
+    ).limit(size)
+    pulled = pulled.order_by(desc(Post.created_at), desc(Post.id)).limit(size)
+
+    return union(pushed, pulled).subquery("timeline")
+
+
+async def trim(session: AsyncSession, batch_size: int = 1000) -> int:
+    trimmed = 0
+    after = None
+
+    while True:
+        users = select(User.id).order_by(User.id).limit(batch_size)  # ty: ignore
+        if after:
+            users = users.where(User.id > after)
+
+        batch = (await session.scalars(users)).all()
+        if not batch:
+            return trimmed
+
+        ranked = (
+            select(
+                TimelineEntry.user_id,
+                TimelineEntry.created_at,
+                TimelineEntry.post_id,
+                func.row_number()
+                .over(
+                    partition_by=TimelineEntry.user_id,  # ty: ignore
+                    order_by=(
+                        desc(TimelineEntry.created_at),
+                        desc(TimelineEntry.post_id),
+                    ),
+                )
+                .label("rank"),
+            )
+            .where(TimelineEntry.user_id.in_(batch))  # ty: ignore
+            .subquery()
+        )
+        statement = delete(TimelineEntry).where(
+            tuple_(
+                TimelineEntry.user_id, TimelineEntry.created_at, TimelineEntry.post_id
+            ).in_(
+                select(ranked.c.user_id, ranked.c.created_at, ranked.c.post_id).where(
+                    ranked.c.rank > settings.TIMELINE_SIZE
+                )
+            )
+        )
+        result = await session.execute(statement)
+        await session.commit()
+
+        trimmed += result.rowcount  # ty: ignore
+        after = batch[-1]
+
+
+class TimelineJobs:
+    def __init__(
+        self, client: Redis, interval: float, trim_interval: float, batch_size: int
+    ) -> None:
+        self.client = client
+        self.interval = interval
+        self.trim_interval = trim_interval
+        self.batch_size = batch_size
+        self.backfills = 0
+        self.backfilled = 0
+        self.trimmed = 0
+        self.failures = 0
+        self.last_run: float | None = None
+        self.last_trim: float | None = None
+        self.task: asyncio.Task | None = None
+
+    async def schedule_backfill(self, author_id: UUID) -> None:
+        try:
+            await self.client.sadd(BACKFILL_KEY, str(author_id))
+        except RedisError:
+            logger.warning("timeline backfill for %s not scheduled", author_id)
+
+    async def process(self, session: AsyncSession) -> None:
+        while True:
+            author_ids: list[bytes] = await self.client.spop(  # ty: ignore
+                BACKFILL_KEY, self.batch_size
+            )
+            if not author_ids:
+                break
+
+            for index, author_id in enumerate(author_ids):
+                try:
+                    self.backfilled += await backfill_followers(
+                        session, UUID(author_id.decode()), self.batch_size
+                    )
+                    self.backfills += 1
+                except Exception:
+                    await session.rollback()
+                    await self.client.sadd(BACKFILL_KEY, *author_ids[index:])
+                    self.failures += 1
+                    raise
+
+        now = time.time()
+        if self.trim_interval and (
+            self.last_trim is None or now - self.last_trim >= self.trim_interval
+        ):
+            self.trimmed += await trim(session, self.batch_size)
+            self.last_trim = now
+
+        self.last_run = now
+
+    async def run(self) -> None:
+        while True:
+            try:
+                async with session() as se:
+                    await self.process(se)
+            except Exception:
+                logger.exception("timeline jobs failed")
+
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self.task:
+            self.task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.task
+            self.task = None
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "backfills": self.backfills,
+            "backfilled": self.backfilled,
+            "trimmed": self.trimmed,
+            "failures": self.failures,
+            "last_run": self.last_run,
+            "last_trim": self.last_trim,
+        }
+
+
+timeline_jobs = TimelineJobs(
+    cache.client,
+    settings.TIMELINE_JOB_INTERVAL,
+    settings.TIMELINE_TRIM_INTERVAL,
+    settings.TIMELINE_JOB_BATCH,
+)
@@ -0,0 +1,163 @@
+import asyncio
+import logging
+from collections.abc import Iterable
+from contextlib import suppress
+from typing import Any
+from uuid import UUID
+
+import orjson
+from redis.asyncio import Redis
+from sqlmodel import func, select
+
+from src.config.cache import cache
+from src.config.db import engine
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+RESYNC = b'event: resync\ndata: {"type":"resync"}\n\n'
+
+
+class Subscriber:
+    def __init__(self, authors: set[str], posts: set[str], size: int) -> None:
+        self.authors = authors
+        self.posts = posts
+        self.queue: asyncio.Queue[bytes] = asyncio.Queue(size)
+        self.dropped = 0
+
+    def put(self, frame: bytes) -> None:
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            self.dropped += self.queue.qsize() + 1
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+
+class Broker:
+    def __init__(self, client: Redis, channel: str, size: int) -> None:
+        self.client = client
+        self.channel = channel
+        self.size = size
+        self.authors: dict[str, set[Subscriber]] = {}
+        self.posts: dict[str, set[Subscriber]] = {}
+        self.connections = 0
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.task: asyncio.Task | None = None
+
+    def subscribe(self, authors: Iterable[UUID], posts: Iterable[UUID]) -> Subscriber:
+        subscriber = Subscriber(
+            {str(id) for id in authors}, {str(id) for id in posts}, self.size
+        )
+        for key in subscriber.authors:
+            self.authors.setdefault(key, set()).add(subscriber)
+        for key in subscriber.posts:
+            self.posts.setdefault(key, set()).add(subscriber)
+
+        self.connections += 1
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        for index, keys in (
+            (self.authors, subscriber.authors),
+            (self.posts, subscriber.posts),
+        ):
+            for key in keys:
+                subscribers = index.get(key)
+                if subscribers is not None:
+                    subscribers.discard(subscriber)
+                    if not subscribers:
+                        del index[key]
+
+        self.connections -= 1
+        self.dropped += subscriber.dropped
+
+    def dispatch(self, payload: bytes) -> None:
+        event = orjson.loads(payload)
+
+        if event["type"] == "post":
+            subscribers = self.authors.get(event["author_id"], ())
+        else:
+            subscribers = self.posts.get(event["post_id"], ())
+
+        if not subscribers:
+            return
+
+        frame = b"event: %s\ndata: %s\n\n" % (event["type"].encode(), payload)
+        for subscriber in subscribers:
+            subscriber.put(frame)
+        self.delivered += len(subscribers)
+
+    async def publish(self, type: str, **fields: Any) -> None:
+        payload = orjson.dumps({"type": type, **fields}, default=str)
+        self.published += 1
+
+        try:
+            if settings.STREAM_BACKEND == "postgres":
+                async with engine.connect() as conn:
+                    await conn.execute(
+                        select(func.pg_notify(self.channel, payload.decode()))
+                    )
+                    await conn.commit()
+            else:
+                await self.client.publish(self.channel, payload)
+        except Exception:
+            logger.warning("stream publish failed, delivering locally", exc_info=True)
+            self.dispatch(payload)
+
+    async def listen_redis(self) -> None:
+        async with self.client.pubsub(ignore_subscribe_messages=True) as pubsub:
+            await pubsub.subscribe(self.channel)
+            async for message in pubsub.listen():
+                self.dispatch(message["data"])
+
+    async def listen_postgres(self) -> None:
+        def notify(connection, pid, channel, payload) -> None:
+            self.dispatch(payload.encode())
+
+        async with engine.connect() as conn:
+            raw = await conn.get_raw_connection()
+            await raw.driver_connection.add_listener(self.channel, notify)  # ty: ignore
+            try:
+                await asyncio.Future()
+            finally:
+                await raw.driver_connection.remove_listener(self.channel, notify)  # ty: ignore
+
+    async def run(self) -> None:
+        while True:
+            try:
+                if settings.STREAM_BACKEND == "postgres":
+                    await self.listen_postgres()
+                else:
+                    await self.listen_redis()
+            except Exception:
+                logger.warning("stream subscription lost", exc_info=True)
+
+            await asyncio.sleep(1)
+
+    def start(self) -> None:
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self.task:
+            self.task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.task
+            self.task = None
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "backend": settings.STREAM_BACKEND,
+            "connections": self.connections,
+            "authors": len(self.authors),
+            "posts": len(self.posts),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+
+broker = Broker(cache.client, settings.STREAM_CHANNEL, settings.STREAM_QUEUE_SIZE)
@@ -0,0 +1,52 @@
+import asyncio
+from collections.abc import AsyncIterator
+from typing import Annotated
+from uuid import UUID
+
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlmodel import select
+
+from src.config.auth import auth_dep
+from src.config.db import session_dep
+from src.config.settings import settings
+from src.stream.broker import broker
+from src.users.models import Follow
+
+stream_router = APIRouter(prefix="/api/v1/stream", tags=["stream"])
+
+
+async def events(authors: set[UUID], posts: list[UUID]) -> AsyncIterator[bytes]:
+    subscriber = broker.subscribe(authors, posts)
+    try:
+        yield b"retry: 5000\n\n"
+        while True:
+            try:
+                yield await asyncio.wait_for(
+                    subscriber.queue.get(), settings.STREAM_KEEPALIVE
+                )
+            except TimeoutError:
+                yield b": ping\n\n"
+    finally:
+        broker.unsubscribe(subscriber)
+
+
+@stream_router.get("", response_class=StreamingResponse)
+async def stream(
+    user_id: auth_dep,
+    session: session_dep,
+    post: Annotated[list[UUID] | None, Query(max_length=100)] = None,
+) -> StreamingResponse:
+    if broker.connections >= settings.STREAM_MAX_CONNECTIONS:
+        raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    statement = select(Follow.following_id).where(Follow.follower_id == user_id)
+    result = await session.execute(statement)
+    authors = {*result.scalars().all(), user_id}
+    await session.close()
+
+    return StreamingResponse(
+        events(authors, post or []),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,14 +1,21 @@
 import pytest
 from alembic import command
 from alembic.config import Config
+from fakeredis import FakeAsyncRedis
 from fastapi import status
 from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from testcontainers.postgres import PostgresContainer
 
+from src.config.cache import Cache, get_cache
 from src.config.db import get_session
+from src.config.limits import rate_limiter
+from src.config.revocation import revocations
 from src.config.settings import settings
 from src.main import app
+from src.posts.timeline import timeline_jobs
+from src.stream.broker import broker
 
 
 @pytest.fixture(scope="session")
@@ -46,6 +53,34 @@ async def session(engine):
         yield se
 
 
+@pytest.fixture
+def statements(engine):
+    recorded: list[tuple[str, list[str]]] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany) -> None:
+        recorded.append((statement, [column[0] for column in cursor.description or ()]))
+
+    event.listen(engine.sync_engine, "after_cursor_execute", record)
+    yield recorded
+    event.remove(engine.sync_engine, "after_cursor_execute", record)
+
+
+@pytest.fixture(autouse=True)
+def rate_limits():
+    yield
+    rate_limiter.reset()
+
+
+@pytest.fixture
+async def cache(monkeypatch):
+    cache = Cache(FakeAsyncRedis())
+    monkeypatch.setattr(broker, "client", cache.client)
+    monkeypatch.setattr(revocations, "client", cache.client)
+    monkeypatch.setattr(timeline_jobs, "client", cache.client)
+    yield cache
+    await cache.client.aclose()
+
+
 @pytest.fixture
 def signup_obj():
     return {
@@ -83,20 +118,45 @@ async def comment_obj(authenticated_client, post_obj):
 
 
 @pytest.fixture
-async def client(session):
+async def client(session, cache):
     async with AsyncClient(transport=ASGITransport(app), base_url="http://test") as cl:
         app.dependency_overrides[get_session] = lambda: session
+        app.dependency_overrides[get_cache] = lambda: cache
         yield cl
         app.dependency_overrides.clear()
 
 
 @pytest.fixture
-async def authenticated_client(session, signup_obj, signin_obj):
+async def authenticated_client(session, cache, signup_obj, signin_obj):
     async with AsyncClient(transport=ASGITransport(app), base_url="http://test") as cl:
         app.dependency_overrides[get_session] = lambda: session
+        app.dependency_overrides[get_cache] = lambda: cache
         await cl.post("/api/v1/auth/signup", json=signup_obj)
         response = await cl.post("/api/v1/auth/signin", data=signin_obj)
         access_token = response.json()["access_token"]
         cl.headers["Authorization"] = f"Bearer {access_token}"
         yield cl
         app.dependency_overrides.clear()
+
+
+@pytest.fixture
+async def other_client(session, cache):
+    async with AsyncClient(transport=ASGITransport(app), base_url="http://test") as cl:
+        app.dependency_overrides[get_session] = lambda: session
+        app.dependency_overrides[get_cache] = lambda: cache
+        await cl.post(
+            "/api/v1/auth/signup",
+            json={
+                "email": "other@user.com",
+                "username": "otheruser",
+                "password": "other-user-other-user",
+            },
+        )
+        response = await cl.post(
+            "/api/v1/auth/signin",
+            data={"username": "otheruser", "password": "other-user-other-user"},
+        )
+        access_token = response.json()["access_token"]
+        cl.headers["Authorization"] = f"Bearer {access_token}"
+        yield cl
+        app.dependency_overrides.clear()
@@ -1,9 +1,44 @@
+import asyncio
+import time
+from uuid import uuid7
+
 import pytest
-from fastapi import status
+from argon2 import PasswordHasher
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+from cryptography.hazmat.primitives.serialization import (
+    Encoding,
+    NoEncryption,
+    PrivateFormat,
+    PublicFormat,
+)
+from fakeredis import FakeAsyncRedis, FakeServer
+from fastapi import HTTPException, status
+from pydantic import SecretStr
+from sqlmodel import select
+
+from src.config import revocation
+from src.config.auth import Token, pa
+from src.config.revocation import Revocations
+from src.config.settings import settings
+from src.users.models import User
 
 pytestmark = pytest.mark.anyio
 
 
+def unreachable_redis() -> FakeAsyncRedis:
+    server = FakeServer()
+    server.connected = False
+    return FakeAsyncRedis(server=server)
+
+
+async def eventually(check) -> None:
+    for _ in range(100):
+        if check():
+            return
+        await asyncio.sleep(0.01)
+    raise TimeoutError
+
+
 class TestAuth:
     async def test_signup_duplicate(self, authenticated_client, signup_obj):
         assert (
@@ -17,6 +52,32 @@ class TestAuth:
             )
         ).status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
 
+    async def test_signup_strength_cached(self, client, signup_obj):
+        payload = {**signup_obj, "password": "weak-password"}
+        for _ in range(2):
+            response = await client.post("/api/v1/auth/signup", json=payload)
+            assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+
+        assert await pa.check_strength("weak-password") is not None
+
+    async def test_signup_strength_timeout(self, client, signup_obj, monkeypatch):
+        monkeypatch.setattr(settings, "PASSWORD_STRENGTH_TIMEOUT", 0)
+        response = await client.post(
+            "/api/v1/auth/signup",
+            json={**signup_obj, "password": f"timeout-{uuid7()}"},
+        )
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+    async def test_signup_strength_backlog(self, client, signup_obj, monkeypatch):
+        await asyncio.wrap_future(pa.scorer.submit(int))
+        monkeypatch.setattr(pa, "scoring", settings.PASSWORD_STRENGTH_QUEUE_SIZE)
+        response = await client.post(
+            "/api/v1/auth/signup",
+            json={**signup_obj, "password": f"backlog-{uuid7()}"},
+        )
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert pa.scoring == settings.PASSWORD_STRENGTH_QUEUE_SIZE
+
     async def test_signin_success(self, client, signin_obj):
         response = await client.post("/api/v1/auth/signin", data=signin_obj)
         assert response.status_code == status.HTTP_200_OK
@@ -32,6 +93,22 @@ class TestAuth:
             )
         ).status_code == status.HTTP_401_UNAUTHORIZED
 
+    async def test_signin_rehash(self, client, session, signin_obj, monkeypatch):
+        monkeypatch.setattr(pa, "hasher", PasswordHasher(time_cost=1))
+        response = await client.post("/api/v1/auth/signin", data=signin_obj)
+        assert response.status_code == status.HTTP_200_OK
+
+        statement = select(User.hashed_password).where(
+            User.username == signin_obj["username"]
+        )
+        assert ",t=1," in (await session.execute(statement)).scalar()
+
+    async def test_signin_overloaded(self, client, signin_obj, monkeypatch):
+        monkeypatch.setattr(settings, "HASHER_QUEUE_SIZE", -settings.HASHER_WORKERS)
+        response = await client.post("/api/v1/auth/signin", data=signin_obj)
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.headers["retry-after"] == "1"
+
     async def test_me_success(self, authenticated_client):
         response = await authenticated_client.get("/api/v1/auth/me")
         assert response.status_code == status.HTTP_200_OK
@@ -40,3 +117,179 @@ class TestAuth:
 
         for key in ["id", "email", "username", "created_at"]:
             assert key in result
+
+    async def test_signout_revokes(self, authenticated_client):
+        response = await authenticated_client.post("/api/v1/auth/signout")
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+
+        response = await authenticated_client.get("/api/v1/auth/me")
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    async def test_signout_redis_down(self, authenticated_client, monkeypatch):
+        monkeypatch.setattr(revocation.revocations, "client", unreachable_redis())
+        monkeypatch.setattr(revocation.revocations, "loaded", True)
+        response = await authenticated_client.post("/api/v1/auth/signout")
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+    async def refresh(self, client, refresh_token):
+        return await client.post(
+            "/api/v1/auth/refresh", headers={"Cookie": f"refresh_token={refresh_token}"}
+        )
+
+    async def test_refresh_rotation(self, authenticated_client, client, signin_obj):
+        tokens = (await client.post("/api/v1/auth/signin", data=signin_obj)).json()
+
+        for _ in range(2):
+            response = await self.refresh(client, tokens["refresh_token"])
+            assert response.status_code == status.HTTP_200_OK
+            assert response.json()["refresh_token"] != tokens["refresh_token"]
+            tokens = response.json()
+
+        response = await client.get(
+            "/api/v1/auth/me",
+            headers={"Authorization": f"Bearer {tokens['access_token']}"},
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+    async def test_refresh_reuse_fail(self, authenticated_client, client, signin_obj):
+        stolen = (await client.post("/api/v1/auth/signin", data=signin_obj)).json()
+        tokens = (await self.refresh(client, stolen["refresh_token"])).json()
+
+        response = await self.refresh(client, stolen["refresh_token"])
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+        response = await self.refresh(client, tokens["refresh_token"])
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+        response = await client.get(
+            "/api/v1/auth/me",
+            headers={"Authorization": f"Bearer {tokens['access_token']}"},
+        )
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+        response = await authenticated_client.get("/api/v1/auth/me")
+        assert response.status_code == status.HTTP_200_OK
+
+    async def test_me_invalid_token_fail(self, client):
+        response = await client.get(
+            "/api/v1/auth/me", headers={"Authorization": "Bearer invalid"}
+        )
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+class TestToken:
+    async def test_cache_hit(self):
+        token = Token()
+        payload = token.encode_token(uuid7(), "access_token")
+        token.decode_token(payload, "access_token")
+
+        assert len(token.claims.entries) == 1
+        assert token.decode_token(payload, "access_token")["type"] == "access_token"
+
+    async def test_cache_type_fail(self):
+        token = Token()
+        payload = token.encode_token(uuid7(), "refresh_token")
+        token.decode_token(payload, "refresh_token")
+
+        with pytest.raises(HTTPException):
+            token.decode_token(payload, "access_token")
+
+    async def test_cache_expired_fail(self, monkeypatch):
+        token = Token()
+        monkeypatch.setattr(settings, "ACCESS_TOKEN_EXPIRE", -1)
+        payload = token.encode_token(uuid7(), "access_token")
+
+        with pytest.raises(HTTPException):
+            token.decode_token(payload, "access_token")
+
+        assert not token.claims.entries
+
+    async def test_cache_eviction(self):
+        token = Token(cache_size=2)
+        for _ in range(3):
+            token.decode_token(
+                token.encode_token(uuid7(), "access_token"), "access_token"
+            )
+
+        assert len(token.claims.entries) == 2
+
+    async def test_asymmetric_success(self, monkeypatch):
+        key = Ed25519PrivateKey.generate()
+        private_key = key.private_bytes(
+            Encoding.PEM, PrivateFormat.PKCS8, NoEncryption()
+        ).decode()
+        public_key = (
+            key.public_key()
+            .public_bytes(Encoding.PEM, PublicFormat.SubjectPublicKeyInfo)
+            .decode()
+        )
+        monkeypatch.setattr(settings, "ALGORITHM", "EdDSA")
+        monkeypatch.setattr(settings, "PRIVATE_KEY", SecretStr(private_key))
+        monkeypatch.setattr(settings, "PUBLIC_KEYS", {"test": public_key})
+        monkeypatch.setattr(settings, "KEY_ID", "test")
+
+        user_id = uuid7()
+        payload = Token().encode_token(user_id, "access_token")
+
+        assert Token().decode_token(payload, "access_token")["sub"] == str(user_id)
+
+        monkeypatch.setattr(settings, "PUBLIC_KEYS", {})
+        with pytest.raises(HTTPException):
+            Token().decode_token(payload, "access_token")
+
+
+class TestRevocations:
+    def revocations(self, client):
+        return Revocations(client, "revocations", 1 << 16, 7, 300)
+
+    async def test_local_check(self):
+        revocations = self.revocations(FakeAsyncRedis())
+        revocations.synced = True
+        await revocations.revoke("revoked", time.time() + 60)
+
+        assert await revocations.is_revoked("other", "revoked")
+        assert not await revocations.is_revoked("other")
+        assert revocations.local_checks == 1
+        assert revocations.remote_checks == 1
+
+    async def test_rotate_once(self):
+        revocations = self.revocations(FakeAsyncRedis())
+        expires_at = time.time() + 60
+
+        assert await revocations.rotate("jti", "family", expires_at)
+        assert not await revocations.rotate("jti", "family", expires_at)
+        assert await revocations.is_revoked("family")
+        assert revocations.reused == 1
+
+    async def test_redis_down(self):
+        revocations = self.revocations(FakeAsyncRedis())
+        await revocations.revoke("revoked", time.time() + 60)
+        revocations.client = unreachable_redis()
+
+        with pytest.raises(HTTPException) as error:
+            await revocations.revoke("other", time.time() + 60)
+        assert error.value.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+        with pytest.raises(HTTPException):
+            await revocations.is_revoked("other")
+
+        revocations.loaded = True
+        assert not await revocations.is_revoked("other")
+        with pytest.raises(HTTPException):
+            await revocations.is_revoked("revoked")
+
+    async def test_sync(self):
+        client = FakeAsyncRedis()
+        publisher = self.revocations(client)
+        subscriber = self.revocations(client)
+        await publisher.revoke("before", time.time() + 60)
+
+        subscriber.start()
+        try:
+            await eventually(lambda: subscriber.synced)
+            assert "before" in subscriber.bloom
+
+            await publisher.revoke("after", time.time() + 60)
+            await eventually(lambda: "after" in subscriber.bloom)
+        finally:
+            await subscriber.stop()
@@ -0,0 +1,156 @@
+import pytest
+from fastapi import status
+
+pytestmark = pytest.mark.anyio
+
+
+class TestCache:
+    async def test_post_hit(self, authenticated_client, cache, post_obj):
+        for _ in range(2):
+            response = await authenticated_client.get(f"/api/v1/posts/{post_obj['id']}")
+            assert response.status_code == status.HTTP_200_OK
+
+        assert cache.misses["post"] == 1
+        assert cache.hits["post"] == 1
+
+    async def test_post_invalidate(self, authenticated_client, post_obj):
+        await authenticated_client.get(f"/api/v1/posts/{post_obj['id']}")
+        await authenticated_client.post(f"/api/v1/posts/{post_obj['id']}/like")
+
+        response = await authenticated_client.get(f"/api/v1/posts/{post_obj['id']}")
+        result = response.json()
+        assert result["total_likes"] == 1
+        assert result["is_liked"] is True
+
+    async def test_post_not_found(self, authenticated_client, cache):
+        response = await authenticated_client.get(
+            "/api/v1/posts/00000000-0000-0000-0000-000000000000"
+        )
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert await cache.client.keys("post:*") == []
+
+    async def test_user_invalidate(self, authenticated_client, cache, post_obj):
+        user = post_obj["user"]
+        await authenticated_client.get(f"/api/v1/users/{user['id']}")
+        await authenticated_client.patch(
+            f"/api/v1/users/{user['id']}", json={"username": "testuser"}
+        )
+        await authenticated_client.get(f"/api/v1/users/{user['id']}")
+
+        assert cache.misses["user"] == 2
+        assert cache.hits["user"] == 0
+
+    async def test_comments_invalidate(self, authenticated_client, post_obj):
+        url = f"/api/v1/posts/{post_obj['id']}/comments"
+        assert (await authenticated_client.get(url)).json() == []
+
+        await authenticated_client.post(url, json={"body": "test-comment"})
+
+        result = (await authenticated_client.get(url)).json()
+        assert result[0]["body"] == "test-comment"
+
+    async def test_outdated_value(self, authenticated_client, cache, post_obj):
+        await cache.client.set(f"post:{post_obj['id']}", b'{"id": "outdated"}')
+
+        response = await authenticated_client.get(f"/api/v1/posts/{post_obj['id']}")
+        assert response.status_code == status.HTTP_200_OK
+        assert cache.misses["post"] == 1
+
+
+class TestConditional:
+    async def revalidate(self, client, url):
+        response = await client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        etag = response.headers["etag"]
+
+        response = await client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.headers["etag"] == etag
+        assert response.content == b""
+        return response
+
+    async def test_post(self, authenticated_client, post_obj):
+        url = f"/api/v1/posts/{post_obj['id']}"
+        response = await self.revalidate(authenticated_client, url)
+        assert response.headers["cache-control"] == "private, no-cache"
+        etag = response.headers["etag"]
+
+        await authenticated_client.put(f"{url}/like")
+        response = await authenticated_client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["total_likes"] == 1
+        assert response.headers["etag"] != etag
+        etag = response.headers["etag"]
+
+        await authenticated_client.patch(url, json={"body": "updated"})
+        response = await authenticated_client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["body"] == "updated"
+
+    async def test_post_per_user(self, authenticated_client, other_client, post_obj):
+        url = f"/api/v1/posts/{post_obj['id']}"
+        await authenticated_client.put(f"{url}/like")
+        etag = (await authenticated_client.get(url)).headers["etag"]
+
+        response = await other_client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["is_liked"] is False
+
+    async def test_user(self, authenticated_client, statements, post_obj):
+        url = f"/api/v1/users/{post_obj['user']['id']}"
+        response = await self.revalidate(authenticated_client, url)
+        assert response.headers["cache-control"].startswith("public, max-age=")
+        etag = response.headers["etag"]
+
+        statements.clear()
+        response = await authenticated_client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert statements == []
+
+        await authenticated_client.patch(url, json={"username": "testuser"})
+        response = await authenticated_client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["etag"] != etag
+
+    async def test_author_renamed(self, authenticated_client, post_obj, comment_obj):
+        me = (await authenticated_client.get("/api/v1/auth/me")).json()
+        urls = [
+            f"/api/v1/posts/{post_obj['id']}",
+            f"/api/v1/posts/{post_obj['id']}/comments",
+        ]
+        etags = [(await authenticated_client.get(url)).headers["etag"] for url in urls]
+
+        await authenticated_client.patch(
+            f"/api/v1/users/{me['id']}", json={"username": "renameduser"}
+        )
+        try:
+            for url, etag in zip(urls, etags, strict=True):
+                response = await authenticated_client.get(
+                    url, headers={"If-None-Match": etag}
+                )
+                assert response.status_code == status.HTTP_200_OK
+                assert response.headers["etag"] != etag
+                assert "renameduser" in response.text
+        finally:
+            await authenticated_client.patch(
+                f"/api/v1/users/{me['id']}", json={"username": me["username"]}
+            )
+
+    async def test_comments(self, authenticated_client, post_obj, comment_obj):
+        url = f"/api/v1/posts/{post_obj['id']}/comments"
+        etag = (await self.revalidate(authenticated_client, url)).headers["etag"]
+
+        await authenticated_client.post(url, json={"body": "test-comment"})
+        response = await authenticated_client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.json()) == 2
+
+    async def test_if_none_match_list(self, authenticated_client, post_obj):
+        url = f"/api/v1/posts/{post_obj['id']}"
+        etag = (await authenticated_client.get(url)).headers["etag"]
+
+        for header in (f'"other", W/{etag}', "*"):
+            response = await authenticated_client.get(
+                url, headers={"If-None-Match": header}
+            )
+            assert response.status_code == status.HTTP_304_NOT_MODIFIED
@@ -1,6 +1,12 @@
+import re
+
+import orjson
 import pytest
 from fastapi import status
+from pydantic import SecretStr
 
+from src.config import profiling
+from src.config.metrics import Metrics, MetricsMiddleware, Registry, metrics
 from src.config.settings import settings
 
 pytestmark = pytest.mark.anyio
@@ -21,3 +27,151 @@ class TestHealth:
         for url in settings.origins:
             response = await client.options("/", headers={"Origin": url})
             assert response.headers.get("access-control-allow-origin") == url
+
+    async def test_pool_metrics(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "METRICS_TOKEN", SecretStr("metrics"))
+        response = await client.get(
+            "/internal/pool", headers={"Authorization": "Bearer metrics"}
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        result = response.json()
+        for key in ["checked_out", "overflow", "wait_ms_total", "timeouts"]:
+            assert key in result
+
+    async def test_pool_metrics_no_auth_fail(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "METRICS_TOKEN", SecretStr("metrics"))
+        response = await client.get(
+            "/internal/pool", headers={"Authorization": "Bearer wrong"}
+        )
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    async def test_pool_metrics_non_ascii_auth_fail(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "METRICS_TOKEN", SecretStr("metrics"))
+        response = await client.get(
+            "/internal/pool", headers={"Authorization": "Bearer métrics".encode()}
+        )
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    async def test_like_buffer_metrics(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "METRICS_TOKEN", SecretStr("metrics"))
+        response = await client.get(
+            "/internal/likes", headers={"Authorization": "Bearer metrics"}
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        result = response.json()
+        for key in ["depth", "flushes", "flush_ms_total", "flush_ms_max"]:
+            assert key in result
+
+    async def test_server_timing(self, authenticated_client, post_obj):
+        response = await authenticated_client.get(f"/api/v1/posts/{post_obj['id']}")
+        assert response.status_code == status.HTTP_200_OK
+        assert 'desc="1 queries"' in response.headers["server-timing"]
+
+    async def test_slow_query_log(self, authenticated_client, monkeypatch, caplog):
+        monkeypatch.setattr(profiling.logger, "disabled", False)
+        monkeypatch.setattr(settings, "SQL_SLOW_QUERY_MS", 0)
+        monkeypatch.setattr(settings, "SQL_N_PLUS_ONE_THRESHOLD", 1)
+        response = await authenticated_client.get("/api/v1/auth/me")
+        assert response.status_code == status.HTTP_200_OK
+
+        assert any(
+            re.fullmatch(
+                r"slow query /api/v1/auth/me \d+\.\dms: SELECT .+", message, re.S
+            )
+            for message in caplog.messages
+        )
+        assert any(
+            re.fullmatch(r"repeated query /api/v1/auth/me 1x: SELECT .+", message, re.S)
+            for message in caplog.messages
+        )
+
+    async def test_sql_metrics(self, authenticated_client, monkeypatch):
+        monkeypatch.setattr(settings, "METRICS_TOKEN", SecretStr("metrics"))
+        monkeypatch.setattr(settings, "SQL_PROFILE_SAMPLE_RATE", 1.0)
+        await authenticated_client.get("/api/v1/auth/me")
+
+        response = await authenticated_client.get(
+            "/internal/sql", headers={"Authorization": "Bearer metrics"}
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        result = response.json()["routes"]["/api/v1/auth/me"]
+        assert result["requests"] >= 1
+        assert sum(result["buckets"].values()) == result["requests"]
+
+    async def test_live(self, client):
+        response = await client.get("/health/live")
+        assert response.status_code == status.HTTP_200_OK
+
+    async def test_ready(self, client):
+        response = await client.get("/health/ready")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["checks"] == {"database": "ok", "cache": "ok"}
+
+    async def test_ready_cache_fail(self, client, cache, monkeypatch):
+        async def ping():
+            raise ConnectionError
+
+        monkeypatch.setattr(cache.client, "ping", ping)
+        response = await client.get("/health/ready")
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.json()["checks"]["cache"] == "unavailable"
+
+    async def test_metrics(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "METRICS_TOKEN", SecretStr("metrics"))
+        await client.get("/api/v1/auth/me")
+
+        response = await client.get(
+            "/metrics", headers={"Authorization": "Bearer metrics"}
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        result = response.text
+        assert "# TYPE http_request_duration_seconds histogram" in result
+        assert 'auth_failures_total{route="/api/v1/auth/me"}' in result
+        assert "http_requests_in_flight" in result
+        assert 'db_pool_connections{state="checked_out"}' in result
+
+    async def test_metrics_stream(self, monkeypatch):
+        registry = Registry()
+        monkeypatch.setattr(metrics, "registry", registry)
+        during = {}
+
+        async def app(scope, receive, send):
+            during.update(registry.values)
+            await send({"type": "http.response.start", "status": 200})
+
+        async def receive():
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            pass
+
+        scope = {"type": "http", "method": "GET", "path": "/api/v1/stream"}
+        await MetricsMiddleware(app)(scope, receive, send)
+
+        assert during == {("http_streams_open", ()): 1}
+        assert registry.values[("http_streams_open", ())] == 0
+        assert ("http_requests_in_flight", ()) not in registry.values
+        assert not registry.histograms
+
+    async def test_metrics_no_auth_fail(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "METRICS_TOKEN", SecretStr("metrics"))
+        response = await client.get("/metrics")
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    async def test_metrics_multiprocess(self, tmp_path):
+        worker = Metrics(str(tmp_path), 5)
+        worker.registry.inc("auth_failures_total", route="/a")
+        worker.registry.observe("http_request_duration_seconds", 0.02, route="/a")
+        snapshot = worker.registry.snapshot()
+        snapshot["pid"] = 0
+        (tmp_path / "0.json").write_bytes(orjson.dumps(snapshot))
+
+        worker.write()
+        result = worker.export()
+        assert 'auth_failures_total{route="/a"} 2' in result
+        assert 'http_request_duration_seconds_bucket{route="/a",le="0.025"} 2' in result
+        assert 'http_request_duration_seconds_count{route="/a"} 2' in result
@@ -0,0 +1,88 @@
+import pytest
+from fastapi import status
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from src.config.limits import loop_monitor, rate_limiter
+
+pytestmark = pytest.mark.anyio
+
+
+class TestRateLimit:
+    async def test_write_limit(self, authenticated_client, post_obj, monkeypatch):
+        monkeypatch.setitem(rate_limiter.policies, "write", (0.01, 2))
+        url = f"/api/v1/posts/{post_obj['id']}/like"
+
+        for _ in range(2):
+            response = await authenticated_client.put(url)
+            assert response.status_code == status.HTTP_200_OK
+
+        response = await authenticated_client.put(url)
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert int(response.headers["retry-after"]) >= 1
+
+    async def test_shared_limit(self, authenticated_client, post_obj, monkeypatch):
+        monkeypatch.setitem(rate_limiter.policies, "write", (0.01, 2))
+        url = f"/api/v1/posts/{post_obj['id']}/like"
+
+        for _ in range(2):
+            await authenticated_client.put(url)
+
+        rate_limiter.reset()
+        response = await authenticated_client.put(url)
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+        async def script(*args, **kwargs):
+            raise AssertionError
+
+        monkeypatch.setattr(rate_limiter, "script", script)
+        response = await authenticated_client.put(url)
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    async def test_local_lease(self, authenticated_client, post_obj, monkeypatch):
+        monkeypatch.setitem(rate_limiter.policies, "write", (1, 30))
+        monkeypatch.setattr(rate_limiter, "lease", 5)
+        url = f"/api/v1/posts/{post_obj['id']}/like"
+        script = rate_limiter.script
+        calls = 0
+
+        async def counted(*args, **kwargs):
+            nonlocal calls
+            calls += 1
+            return await script(*args, **kwargs)
+
+        monkeypatch.setattr(rate_limiter, "script", counted)
+
+        for _ in range(10):
+            response = await authenticated_client.put(url)
+            assert response.status_code == status.HTTP_200_OK
+
+        assert calls == 2
+
+    async def test_signin_limit(self, client, signup_obj, signin_obj, monkeypatch):
+        monkeypatch.setitem(rate_limiter.policies, "auth", (0.01, 2))
+        await client.post("/api/v1/auth/signup", json=signup_obj)
+        await client.post("/api/v1/auth/signin", data=signin_obj)
+
+        response = await client.post("/api/v1/auth/signin", data=signin_obj)
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    async def test_fail_open(self, authenticated_client, post_obj, monkeypatch):
+        async def script(*args, **kwargs):
+            raise RedisConnectionError
+
+        monkeypatch.setattr(rate_limiter, "script", script)
+        response = await authenticated_client.put(
+            f"/api/v1/posts/{post_obj['id']}/like"
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+
+class TestLoadShed:
+    async def test_lag(self, authenticated_client, monkeypatch):
+        monkeypatch.setattr(loop_monitor, "lag", 1.0)
+        response = await authenticated_client.get("/api/v1/posts")
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.headers["retry-after"] == "1"
+
+        response = await authenticated_client.get("/health/live")
+        assert response.status_code == status.HTTP_200_OK
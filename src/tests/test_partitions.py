@@ -0,0 +1,122 @@
+from datetime import UTC, datetime
+from uuid import UUID
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select, text
+
+from src.config.db import is_foreign_key_violation, is_missing_partition
+from src.posts.models import Comment, Like, Post, TimelineEntry
+from src.posts.partitions import (
+    Partitions,
+    add_months,
+    month_start,
+    uuid7_at,
+    uuid7_floor,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+class TestPartitions:
+    def partitions(self):
+        return Partitions(premake=1, retention=0, schema="archive", interval=3600)
+
+    async def test_uuid7_bounds(self):
+        month = datetime(2020, 12, 1, tzinfo=UTC)
+        post_id = uuid7_at(datetime(2020, 12, 31, 23, 59, tzinfo=UTC))
+
+        assert post_id.version == 7
+        assert uuid7_floor(month) < post_id < uuid7_floor(add_months(month, 1))
+        assert add_months(month, 1) == datetime(2021, 1, 1, tzinfo=UTC)
+        assert month_start(datetime(2020, 12, 31, 23, 59, tzinfo=UTC)) == month
+
+    async def test_created_at(self, post_obj):
+        post_id = UUID(post_obj["id"])
+        created_at = datetime.fromisoformat(post_obj["created_at"])
+
+        assert created_at == datetime.fromtimestamp((post_id.int >> 80) / 1000, UTC)
+
+    async def test_cursor_prunes(self, session):
+        current = month_start(datetime.now(UTC))
+        result = await session.execute(
+            text("EXPLAIN SELECT id FROM posts WHERE id < :bound ORDER BY id DESC"),
+            {"bound": uuid7_floor(current)},
+        )
+        plan = "\n".join(result.scalars().all())
+
+        assert f"posts_p{current:%Y%m}" not in plan
+
+    async def test_missing_partition(self, engine):
+        errors = []
+
+        async with engine.connect() as conn:
+            await conn.exec_driver_sql(
+                "CREATE TEMP TABLE checked (value int CHECK (value > 0))"
+            )
+            await conn.commit()
+
+            for statement in (
+                "INSERT INTO likes (post_id, user_id) "
+                "VALUES ('00000000-0000-0000-0000-000000000000', uuidv7())",
+                "INSERT INTO checked VALUES (0)",
+            ):
+                with pytest.raises(IntegrityError) as error:
+                    await conn.exec_driver_sql(statement)
+                errors.append(error.value)
+                await conn.rollback()
+
+        assert [is_missing_partition(error) for error in errors] == [True, False]
+        assert not any(is_foreign_key_violation(error) for error in errors)
+
+    async def test_archive(self, authenticated_client, engine, session):
+        month = datetime(2020, 1, 1, tzinfo=UTC)
+        partitions = self.partitions()
+
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await partitions.ensure(conn, month, add_months(month, 1))
+            await partitions.ensure(conn, month, add_months(month, 1))
+            assert partitions.created == 3
+
+            me = (await authenticated_client.get("/api/v1/auth/me")).json()
+            user_id = UUID(me["id"])
+            post = Post(id=uuid7_at(month), body="old", user_id=user_id)
+            session.add(post)
+            await session.flush()
+            session.add_all(
+                [
+                    Like(post_id=post.id, user_id=user_id),
+                    Comment(body="old", user_id=user_id, post_id=post.id),
+                    TimelineEntry(
+                        user_id=user_id,
+                        created_at=month,
+                        post_id=post.id,
+                        author_id=user_id,
+                    ),
+                ]
+            )
+            await session.commit()
+
+            try:
+                await partitions.archive(conn, month)
+
+                assert partitions.archived == 1
+                assert not await session.scalar(
+                    select(Post.id).where(Post.id == post.id)
+                )
+                archived = await conn.execute(
+                    text(
+                        """
+                        SELECT count(*) FROM archive.posts_p202001
+                        UNION ALL SELECT count(*) FROM archive.likes_p202001
+                        UNION ALL SELECT count(*) FROM archive.comments_p202001
+                        """
+                    )
+                )
+                assert archived.scalars().all() == [1, 1, 1]
+            finally:
+                for table in ("comments", "likes", "posts"):
+                    await conn.execute(
+                        text(f"DROP TABLE IF EXISTS archive.{table}_p202001")
+                    )
@@ -1,5 +1,16 @@
+from uuid import UUID, uuid7
+
 import pytest
 from fastapi import status
+from sqlmodel import select, update
+
+from src.config.settings import settings
+from src.posts.buffer import like_buffer
+from src.posts.commands import reconcile_counters
+from src.posts.models import Post, TimelineEntry
+from src.posts.timeline import BACKFILL_KEY, timeline_jobs
+from src.users.models import User
+from src.users.routers import add_follow, remove_follow, unfollowed
 
 pytestmark = pytest.mark.anyio
 
@@ -31,6 +42,69 @@ class TestPost:
         result = response.json()
         assert result[0]["body"] == post_obj["body"]
 
+    async def test_get_all_contract_success(self, authenticated_client, post_obj):
+        response = await authenticated_client.get(
+            "/api/v1/posts", params={"id": post_obj["user"]["id"]}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        listed = next(row for row in response.json() if row["id"] == post_obj["id"])
+
+        response = await authenticated_client.get(f"/api/v1/posts/{post_obj['id']}")
+        assert listed == response.json()
+
+    async def test_get_cursor_success(self, authenticated_client, post_obj):
+        await authenticated_client.post("/api/v1/posts", json={"body": "test-post"})
+
+        response = await authenticated_client.get("/api/v1/posts?limit=1")
+        assert response.status_code == status.HTTP_200_OK
+
+        cursor = response.headers["x-next-cursor"]
+        first = response.json()
+
+        response = await authenticated_client.get(
+            "/api/v1/posts", params={"limit": 1, "cursor": cursor}
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        result = response.json()
+        assert result[0]["id"] != first[0]["id"]
+        assert result[0]["created_at"] <= first[0]["created_at"]
+
+    async def test_get_cursor_invalid_fail(self, authenticated_client):
+        response = await authenticated_client.get("/api/v1/posts?cursor=invalid")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    async def test_batch_get_success(self, authenticated_client, post_obj):
+        other = (
+            await authenticated_client.post("/api/v1/posts", json={"body": "other"})
+        ).json()
+        await authenticated_client.put(f"/api/v1/posts/{other['id']}/like")
+        missing = "00000000-0000-0000-0000-000000000000"
+
+        response = await authenticated_client.post(
+            "/api/v1/posts:batchGet",
+            json={"ids": [other["id"], missing, post_obj["id"], other["id"]]},
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        result = response.json()
+        assert [p and p["id"] for p in result["posts"]] == [
+            other["id"],
+            None,
+            post_obj["id"],
+            other["id"],
+        ]
+        assert result["posts"][0]["is_liked"] is True
+        assert result["posts"][0]["total_likes"] == 1
+        assert result["posts"][2]["is_liked"] is False
+        assert result["missing"] == [missing]
+
+    async def test_batch_get_limit_fail(self, authenticated_client):
+        response = await authenticated_client.post(
+            "/api/v1/posts:batchGet", json={"ids": [str(uuid7()) for _ in range(251)]}
+        )
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+
     async def test_get_no_auth_fail(self, client):
         response = await client.get("/api/v1/posts")
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
@@ -54,6 +128,201 @@ class TestPost:
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
 
 
+class TestSearch:
+    async def test_search_success(self, authenticated_client):
+        await authenticated_client.post(
+            "/api/v1/posts", json={"body": "<b>Zebras</b> are grazing near the river"}
+        )
+
+        response = await authenticated_client.get("/api/v1/posts/search?q=zebra")
+        assert response.status_code == status.HTTP_200_OK
+
+        result = response.json()
+        assert result[0]["body"] == "<b>Zebras</b> are grazing near the river"
+        assert "<mark>Zebras</mark>" in result[0]["snippet"]
+        assert "&lt;b&gt;" in result[0]["snippet"]
+        assert result[0]["is_liked"] is False
+
+    async def test_search_cursor_success(self, authenticated_client):
+        for body in ("quokka", "quokka quokka", "quokka quokka quokka"):
+            await authenticated_client.post("/api/v1/posts", json={"body": body})
+
+        response = await authenticated_client.get(
+            "/api/v1/posts/search", params={"q": "quokka", "limit": 2}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        first = [row["body"] for row in response.json()]
+        assert first == ["quokka quokka quokka", "quokka quokka"]
+
+        response = await authenticated_client.get(
+            "/api/v1/posts/search",
+            params={
+                "q": "quokka",
+                "limit": 2,
+                "cursor": response.headers["x-next-cursor"],
+            },
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert [row["body"] for row in response.json()] == ["quokka"]
+
+    async def test_search_truncated_success(self, authenticated_client, monkeypatch):
+        for _ in range(2):
+            await authenticated_client.post("/api/v1/posts", json={"body": "narwhal"})
+
+        response = await authenticated_client.get("/api/v1/posts/search?q=narwhal")
+        assert len(response.json()) == 2
+        assert "x-truncated" not in response.headers
+
+        monkeypatch.setattr(settings, "POST_SEARCH_CANDIDATES", 1)
+        response = await authenticated_client.get("/api/v1/posts/search?q=narwhal")
+        assert len(response.json()) == 1
+        assert response.headers["x-truncated"] == "true"
+
+    async def test_search_no_match_success(self, authenticated_client):
+        response = await authenticated_client.get("/api/v1/posts/search?q=xylophone")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == []
+
+    async def test_search_cursor_invalid_fail(self, authenticated_client):
+        response = await authenticated_client.get(
+            "/api/v1/posts/search", params={"q": "quokka", "cursor": "invalid"}
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestFeed:
+    async def follow(self, client, other_client) -> str:
+        other = (await other_client.get("/api/v1/auth/me")).json()
+        response = await client.post(f"/api/v1/users/{other['id']}/follow")
+        assert response.status_code == status.HTTP_200_OK
+        return other["id"]
+
+    async def feed(self, client) -> list[str]:
+        response = await client.get("/api/v1/posts?feed=true")
+        assert response.status_code == status.HTTP_200_OK
+        return [row["id"] for row in response.json()]
+
+    async def test_fan_out_success(self, authenticated_client, other_client):
+        other_id = await self.follow(authenticated_client, other_client)
+        post = (await other_client.post("/api/v1/posts", json={"body": "push"})).json()
+        assert post["id"] in await self.feed(authenticated_client)
+
+        await authenticated_client.post(f"/api/v1/users/{other_id}/follow")
+        assert post["id"] not in await self.feed(authenticated_client)
+
+    async def test_backfill_success(self, authenticated_client, other_client):
+        post = (await other_client.post("/api/v1/posts", json={"body": "old"})).json()
+        other_id = await self.follow(authenticated_client, other_client)
+        assert post["id"] in await self.feed(authenticated_client)
+
+        await authenticated_client.post(f"/api/v1/users/{other_id}/follow")
+
+    async def test_timeline_cap_success(
+        self, authenticated_client, other_client, session, monkeypatch
+    ):
+        monkeypatch.setattr(settings, "TIMELINE_SIZE", 2)
+        monkeypatch.setattr(timeline_jobs, "last_trim", None)
+        user_id = (await authenticated_client.get("/api/v1/auth/me")).json()["id"]
+        other_id = await self.follow(authenticated_client, other_client)
+        posts = [
+            (await other_client.post("/api/v1/posts", json={"body": "cap"})).json()
+            for _ in range(3)
+        ]
+
+        await timeline_jobs.process(session)
+        entries = await session.scalars(
+            select(TimelineEntry.post_id).where(TimelineEntry.user_id == UUID(user_id))
+        )
+        assert {str(post_id) for post_id in entries} == {
+            posts[1]["id"],
+            posts[2]["id"],
+        }
+        assert timeline_jobs.trimmed >= 1
+
+        await authenticated_client.post(f"/api/v1/users/{other_id}/follow")
+
+    async def test_fan_out_on_read_success(
+        self, authenticated_client, other_client, monkeypatch
+    ):
+        monkeypatch.setattr(settings, "TIMELINE_FANOUT_LIMIT", 0)
+        other_id = await self.follow(authenticated_client, other_client)
+        post = (await other_client.post("/api/v1/posts", json={"body": "pull"})).json()
+        assert post["id"] in await self.feed(authenticated_client)
+
+        await authenticated_client.post(f"/api/v1/users/{other_id}/follow")
+        assert post["id"] not in await self.feed(authenticated_client)
+
+    async def test_fan_out_limit_crossed_success(
+        self, authenticated_client, other_client, session, cache, monkeypatch
+    ):
+        monkeypatch.setattr(settings, "TIMELINE_FANOUT_LIMIT", 1)
+        other_id = await self.follow(authenticated_client, other_client)
+        await authenticated_client.post(
+            "/api/v1/auth/signup",
+            json={
+                "email": "third@user.com",
+                "username": "thirduser",
+                "password": "third-user-third-user",
+            },
+        )
+        third_id = await session.scalar(
+            select(User.id).where(User.username == "thirduser")
+        )
+        await add_follow(session, third_id, UUID(other_id))
+        await session.commit()
+
+        post = (await other_client.post("/api/v1/posts", json={"body": "pull"})).json()
+        assert post["id"] in await self.feed(authenticated_client)
+
+        assert await remove_follow(session, third_id, UUID(other_id)) == 1
+        await session.commit()
+        await unfollowed(UUID(other_id), 1)
+        await unfollowed(UUID(other_id), 1)
+        assert await cache.client.smembers(BACKFILL_KEY) == {other_id.encode()}
+        assert post["id"] not in await self.feed(authenticated_client)
+
+        await timeline_jobs.process(session)
+        assert not await cache.client.exists(BACKFILL_KEY)
+        assert post["id"] in await self.feed(authenticated_client)
+
+        await authenticated_client.post(f"/api/v1/users/{other_id}/follow")
+
+    async def test_put_follow_idempotent_success(
+        self, authenticated_client, other_client, session
+    ):
+        other = (await other_client.get("/api/v1/auth/me")).json()
+        url = f"/api/v1/users/{other['id']}/follow"
+        user = await session.get(User, UUID(other["id"]))
+        follower_count = user.follower_count
+
+        for _ in range(2):
+            response = await authenticated_client.put(url)
+            assert response.status_code == status.HTTP_200_OK
+            assert response.json() == {"following": True}
+
+        await session.refresh(user)
+        assert user.follower_count == follower_count + 1
+
+        for _ in range(2):
+            response = await authenticated_client.delete(url)
+            assert response.status_code == status.HTTP_200_OK
+            assert response.json() == {"following": False}
+
+        await session.refresh(user)
+        assert user.follower_count == follower_count
+
+    async def test_put_follow_not_found_fail(self, authenticated_client):
+        response = await authenticated_client.put(
+            "/api/v1/users/00000000-0000-0000-0000-000000000000/follow"
+        )
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    async def test_put_follow_self_fail(self, authenticated_client):
+        me = (await authenticated_client.get("/api/v1/auth/me")).json()
+        response = await authenticated_client.put(f"/api/v1/users/{me['id']}/follow")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
 class TestLike:
     async def test_success(self, authenticated_client, post_obj):
         assert (
@@ -67,6 +336,22 @@ class TestLike:
         assert result["total_likes"] > 0
         assert result["is_liked"] is True
 
+    async def test_reconcile_success(self, authenticated_client, session, post_obj):
+        await authenticated_client.post(f"/api/v1/posts/{post_obj['id']}/like")
+        await session.execute(
+            update(Post)
+            .where(Post.id == post_obj["id"])  # ty: ignore
+            .values(like_count=42, comment_count=42)
+        )
+        await session.commit()
+
+        assert await reconcile_counters(session) > 0
+
+        response = await authenticated_client.get(f"/api/v1/posts/{post_obj['id']}")
+        result = response.json()
+        assert result["total_likes"] == 1
+        assert result["total_comments"] == 0
+
     async def test_no_auth_fail(self, client, post_obj):
         response = await client.post(f"/api/v1/posts/{post_obj['id']}/like")
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
@@ -77,6 +362,37 @@ class TestLike:
         )
         assert response.status_code == status.HTTP_404_NOT_FOUND
 
+    async def test_put_idempotent_success(self, authenticated_client, post_obj):
+        url = f"/api/v1/posts/{post_obj['id']}/like"
+
+        for _ in range(2):
+            response = await authenticated_client.put(url)
+            assert response.status_code == status.HTTP_200_OK
+            assert response.json() == {"is_liked": True}
+
+        result = (
+            await authenticated_client.get(f"/api/v1/posts/{post_obj['id']}")
+        ).json()
+        assert result["total_likes"] == 1
+        assert result["is_liked"] is True
+
+        for _ in range(2):
+            response = await authenticated_client.delete(url)
+            assert response.status_code == status.HTTP_200_OK
+            assert response.json() == {"is_liked": False}
+
+        result = (
+            await authenticated_client.get(f"/api/v1/posts/{post_obj['id']}")
+        ).json()
+        assert result["total_likes"] == 0
+        assert result["is_liked"] is False
+
+    async def test_put_not_found_fail(self, authenticated_client):
+        response = await authenticated_client.put(
+            "/api/v1/posts/00000000-0000-0000-0000-000000000000/like"
+        )
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
     async def test_delete_success(self, authenticated_client, post_obj):
         assert (
             await authenticated_client.post(f"/api/v1/posts/{post_obj['id']}/like")
@@ -93,6 +409,46 @@ class TestLike:
         assert result["total_likes"] == 0
         assert result["is_liked"] is False
 
+    async def test_write_behind_success(
+        self, authenticated_client, other_client, post_obj, session, cache, monkeypatch
+    ):
+        monkeypatch.setattr(settings, "LIKES_WRITE_BEHIND", True)
+        url = f"/api/v1/posts/{post_obj['id']}"
+
+        await authenticated_client.put(f"{url}/like")
+        await authenticated_client.delete(f"{url}/like")
+        assert (await authenticated_client.post(f"{url}/like")).json() == {
+            "is_liked": True
+        }
+        assert like_buffer.snapshot()["depth"] == 1
+
+        result = (await authenticated_client.get(url)).json()
+        assert result["total_likes"] == 1
+        assert result["is_liked"] is True
+        assert (await other_client.get(url)).json()["total_likes"] == 0
+
+        assert await like_buffer.flush(session, cache) == 1
+        assert like_buffer.snapshot()["depth"] == 0
+        assert (await other_client.get(url)).json()["total_likes"] == 1
+
+        post = await session.get(Post, UUID(post_obj["id"]))
+        await session.refresh(post)
+        assert post.like_count == 1
+
+        result = (await authenticated_client.get(url)).json()
+        assert result["total_likes"] == 1
+        assert result["is_liked"] is True
+
+        await authenticated_client.delete(f"{url}/like")
+        assert await like_buffer.flush(session, cache) == 1
+
+        await session.refresh(post)
+        assert post.like_count == 0
+
+        result = (await authenticated_client.get(url)).json()
+        assert result["total_likes"] == 0
+        assert result["is_liked"] is False
+
 
 class TestComment:
     async def test_create_success(self, authenticated_client, post_obj):
@@ -105,6 +461,9 @@ class TestComment:
         result = response.json()
         assert result["body"] == "test-comment"
 
+        response = await authenticated_client.get(f"/api/v1/posts/{post_obj['id']}")
+        assert response.json()["total_comments"] == 1
+
     async def test_get_success(self, authenticated_client, post_obj, comment_obj):
         response = await authenticated_client.get(
             f"/api/v1/posts/{post_obj['id']}/comments"
@@ -114,9 +473,35 @@ class TestComment:
         result = response.json()
         assert result[0]["body"] == comment_obj["body"]
 
+    async def test_get_cursor_success(self, authenticated_client, post_obj):
+        url = f"/api/v1/posts/{post_obj['id']}/comments"
+        for body in ("first", "second", "third"):
+            await authenticated_client.post(url, json={"body": body})
+
+        response = await authenticated_client.get(url, params={"limit": 2})
+        assert response.status_code == status.HTTP_200_OK
+        assert [c["body"] for c in response.json()] == ["third", "second"]
+
+        response = await authenticated_client.get(
+            url, params={"limit": 2, "cursor": response.headers["x-next-cursor"]}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert [c["body"] for c in response.json()] == ["first"]
+        assert response.json()[0]["user"]["username"] == "testuser"
+        assert "x-next-cursor" not in response.headers
+
+    async def test_get_limit_fail(self, authenticated_client, post_obj):
+        response = await authenticated_client.get(
+            f"/api/v1/posts/{post_obj['id']}/comments", params={"limit": 101}
+        )
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+
     async def test_delete_success(self, authenticated_client, post_obj, comment_obj):
         assert (
             await authenticated_client.delete(
                 f"/api/v1/posts/{post_obj['id']}/comments/{comment_obj['id']}"
             )
         ).status_code == status.HTTP_204_NO_CONTENT
+
+        response = await authenticated_client.get(f"/api/v1/posts/{post_obj['id']}")
+        assert response.json()["total_comments"] == 0
@@ -0,0 +1,87 @@
+import pytest
+from fastapi import status
+
+pytestmark = pytest.mark.anyio
+
+
+class TestQueries:
+    async def fetch(self, client, statements, url, **kwargs):
+        statements.clear()
+        if "json" in kwargs:
+            response = await client.post(url, **kwargs)
+        else:
+            response = await client.get(url, **kwargs)
+        assert response.status_code == status.HTTP_200_OK
+        assert len(statements) == 1, [statement for statement, _ in statements]
+        return response
+
+    async def assert_projected(self, client, statements, url, **kwargs):
+        response = await self.fetch(client, statements, url, **kwargs)
+        _, columns = statements[0]
+        assert "email" not in columns
+        assert "hashed_password" not in columns
+        return response
+
+    async def test_get_posts(self, authenticated_client, statements, post_obj):
+        await self.assert_projected(authenticated_client, statements, "/api/v1/posts")
+        await self.assert_projected(
+            authenticated_client, statements, "/api/v1/posts?feed=true"
+        )
+
+    async def test_get_post(self, authenticated_client, statements, post_obj):
+        url = f"/api/v1/posts/{post_obj['id']}"
+        await self.assert_projected(authenticated_client, statements, url)
+        await self.assert_projected(authenticated_client, statements, url)
+
+    async def test_batch_get_posts(self, authenticated_client, statements, post_obj):
+        await self.assert_projected(
+            authenticated_client,
+            statements,
+            "/api/v1/posts:batchGet",
+            json={"ids": [post_obj["id"]]},
+        )
+
+    async def test_search_posts(self, authenticated_client, statements, post_obj):
+        await self.assert_projected(
+            authenticated_client, statements, "/api/v1/posts/search?q=test"
+        )
+
+    async def test_get_comments(
+        self, authenticated_client, statements, post_obj, comment_obj
+    ):
+        url = f"/api/v1/posts/{post_obj['id']}/comments"
+        await authenticated_client.post(url, json={"body": "test-comment"})
+
+        response = await self.assert_projected(
+            authenticated_client, statements, f"{url}?limit=1"
+        )
+        cursor = response.headers["x-next-cursor"]
+        await self.assert_projected(
+            authenticated_client, statements, f"{url}?limit=1&cursor={cursor}"
+        )
+
+    async def test_get_user(self, authenticated_client, statements, post_obj):
+        await self.assert_projected(
+            authenticated_client, statements, f"/api/v1/users/{post_obj['user']['id']}"
+        )
+
+    async def test_batch_get_users(self, authenticated_client, statements, post_obj):
+        await self.assert_projected(
+            authenticated_client,
+            statements,
+            "/api/v1/users:batchGet",
+            json={"ids": [post_obj["user"]["id"]]},
+        )
+
+    async def test_search_users(self, authenticated_client, statements):
+        await self.assert_projected(
+            authenticated_client, statements, "/api/v1/users?search=test"
+        )
+        await self.assert_projected(
+            authenticated_client, statements, "/api/v1/users/autocomplete?prefix=te"
+        )
+
+    async def test_me(self, authenticated_client, statements):
+        await self.fetch(authenticated_client, statements, "/api/v1/auth/me")
+        _, columns = statements[0]
+        assert "hashed_password" not in columns
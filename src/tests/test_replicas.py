@@ -0,0 +1,101 @@
+import pytest
+from fastapi import status
+from sqlalchemy import event
+
+from src.config import replicas as module
+from src.config.replicas import STICKY_COOKIE, ReplicaRouter
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def router(engine, monkeypatch):
+    url = engine.url.render_as_string(hide_password=False)
+    router = ReplicaRouter([url, url], max_lag=5, interval=1)
+    monkeypatch.setattr(module, "replicas", router)
+    yield router
+    await router.stop()
+
+
+@pytest.fixture
+def reads(router):
+    recorded = []
+
+    def record(conn, cursor, statement, parameters, context, executemany) -> None:
+        recorded.append(statement)
+
+    for replica in router.replicas:
+        event.listen(replica.engine.sync_engine, "after_cursor_execute", record)
+    return recorded
+
+
+class TestReplicas:
+    async def test_round_robin(self, router):
+        first, second = router.replicas
+
+        assert [router.choose(), router.choose()] == [first, second]
+
+        second.healthy = False
+        assert [router.choose(), router.choose()] == [first, first]
+
+        first.healthy = False
+        assert router.choose() is None
+        assert router.primary_reads == 1
+
+    async def test_health_check(self, router):
+        first = router.replicas[0]
+        await router.check(first)
+
+        assert first.healthy
+        assert first.lag == 0
+
+        unreachable = ReplicaRouter(
+            [first.engine.url.set(port=1).render_as_string(hide_password=False)],
+            max_lag=5,
+            interval=1,
+        )
+        await unreachable.check(unreachable.replicas[0])
+        await unreachable.stop()
+
+        assert not unreachable.replicas[0].healthy
+        assert unreachable.replicas[0].failures == 1
+
+    async def test_read_routing(self, router, reads, authenticated_client, post_obj):
+        response = await authenticated_client.get("/api/v1/posts")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()[0]["id"] == post_obj["id"]
+        assert reads
+
+        response = await authenticated_client.put(
+            f"/api/v1/posts/{post_obj['id']}/like"
+        )
+        sticky = response.cookies[STICKY_COOKIE]
+        reads.clear()
+
+        response = await authenticated_client.get(
+            "/api/v1/posts", headers={"Cookie": f"{STICKY_COOKIE}={sticky}"}
+        )
+        assert response.json()[0]["is_liked"]
+        assert not reads
+        assert router.sticky_reads == 1
+
+    async def test_cache_fill_from_primary(self, reads, authenticated_client, post_obj):
+        for url in (
+            f"/api/v1/posts/{post_obj['id']}",
+            f"/api/v1/posts/{post_obj['id']}/comments",
+            f"/api/v1/users/{post_obj['user']['id']}",
+        ):
+            response = await authenticated_client.get(url)
+            assert response.status_code == status.HTTP_200_OK
+
+        assert not reads
+
+    async def test_user_search_on_replica(self, reads, authenticated_client):
+        for url in (
+            "/api/v1/users?search=testuser",
+            "/api/v1/users/autocomplete?prefix=test",
+        ):
+            reads.clear()
+            response = await authenticated_client.get(url)
+            assert response.status_code == status.HTTP_200_OK
+            assert reads
@@ -0,0 +1,130 @@
+import asyncio
+from contextlib import suppress
+from uuid import uuid7
+
+import orjson
+import pytest
+from fastapi import status
+from redis.exceptions import ConnectionError as RedisConnectionError
+from starlette.requests import ClientDisconnect
+
+from src.main import app
+from src.stream.broker import RESYNC, Broker, broker
+
+pytestmark = pytest.mark.anyio
+
+
+async def subscribed(client, channel: str) -> None:
+    for _ in range(100):
+        if dict(await client.pubsub_numsub(channel)).get(channel.encode()):
+            return
+        await asyncio.sleep(0.01)
+    raise TimeoutError
+
+
+def stream_scope(client, query: str) -> dict:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.4"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/api/v1/stream",
+        "raw_path": b"/api/v1/stream",
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": [(b"authorization", client.headers["authorization"].encode())],
+        "client": ("127.0.0.1", 1),
+        "server": ("test", 80),
+    }
+
+
+async def receive():
+    await asyncio.Future()
+
+
+class TestStream:
+    async def test_no_auth_fail(self, client):
+        response = await client.get("/api/v1/stream")
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    async def test_dispatch(self, cache):
+        author, post = uuid7(), uuid7()
+        test_broker = Broker(cache.client, "test", 8)
+        subscriber = test_broker.subscribe([author], [post])
+
+        for event in (
+            {"type": "post", "post_id": str(uuid7()), "author_id": str(author)},
+            {"type": "comment", "post_id": str(post)},
+            {"type": "like", "post_id": str(uuid7())},
+            {"type": "post", "post_id": str(uuid7()), "author_id": str(uuid7())},
+        ):
+            test_broker.dispatch(orjson.dumps(event))
+
+        assert subscriber.queue.qsize() == 2
+        assert subscriber.queue.get_nowait().startswith(b"event: post\ndata: ")
+        assert subscriber.queue.get_nowait().startswith(b"event: comment\ndata: ")
+
+        test_broker.unsubscribe(subscriber)
+        assert test_broker.snapshot()["authors"] == 0
+
+    async def test_overflow(self, cache):
+        post = uuid7()
+        test_broker = Broker(cache.client, "test", 2)
+        subscriber = test_broker.subscribe([], [post])
+
+        for _ in range(3):
+            test_broker.dispatch(orjson.dumps({"type": "like", "post_id": str(post)}))
+
+        assert subscriber.queue.get_nowait() == RESYNC
+        assert subscriber.queue.empty()
+        assert subscriber.dropped == 3
+
+    async def test_publish_fallback(self, cache, monkeypatch):
+        async def publish(*args):
+            raise RedisConnectionError
+
+        post = uuid7()
+        test_broker = Broker(cache.client, "test", 8)
+        monkeypatch.setattr(cache.client, "publish", publish)
+        subscriber = test_broker.subscribe([], [post])
+
+        await test_broker.publish("like", post_id=post, is_liked=True)
+        assert subscriber.queue.qsize() == 1
+
+    async def test_stream_success(self, authenticated_client, other_client, post_obj):
+        broker.start()
+        try:
+            await subscribed(broker.client, broker.channel)
+
+            messages = asyncio.Queue()
+            scope = stream_scope(authenticated_client, f"post={post_obj['id']}")
+            task = asyncio.create_task(app(scope, receive, messages.put))
+            try:
+                start = await asyncio.wait_for(messages.get(), 5)
+                assert start["status"] == status.HTTP_200_OK
+                await asyncio.wait_for(messages.get(), 5)
+
+                await other_client.post(
+                    f"/api/v1/posts/{post_obj['id']}/comments",
+                    json={"body": "test-comment"},
+                )
+                message = await asyncio.wait_for(messages.get(), 5)
+                assert message["body"].startswith(b"event: comment\ndata: ")
+            finally:
+                task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await task
+
+            assert broker.connections == 0
+        finally:
+            await broker.stop()
+
+    async def test_stream_disconnect_before_body(self, authenticated_client):
+        async def send(message):
+            raise ConnectionResetError
+
+        with pytest.raises(ClientDisconnect):
+            await app(stream_scope(authenticated_client, ""), receive, send)
+
+        assert broker.connections == 0
@@ -0,0 +1,144 @@
+from uuid import UUID
+
+import pytest
+from fastapi import status
+
+from src.posts.models import Post
+from src.users.models import User
+from src.users.trie import user_trie
+
+pytestmark = pytest.mark.anyio
+
+
+class TestUser:
+    async def test_delete_counters_success(
+        self, client, authenticated_client, post_obj, session
+    ):
+        me = (await authenticated_client.get("/api/v1/auth/me")).json()
+        user = await session.get(User, UUID(me["id"]))
+        follower_count = user.follower_count
+
+        await client.post(
+            "/api/v1/auth/signup",
+            json={
+                "email": "deleted@user.com",
+                "username": "deleteduser",
+                "password": "deleted-user-deleted-user",
+            },
+        )
+        response = await client.post(
+            "/api/v1/auth/signin",
+            data={"username": "deleteduser", "password": "deleted-user-deleted-user"},
+        )
+        client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+        deleted = (await client.get("/api/v1/auth/me")).json()
+
+        url = f"/api/v1/posts/{post_obj['id']}"
+        await client.put(f"{url}/like")
+        for _ in range(2):
+            await client.post(f"{url}/comments", json={"body": "bye"})
+        await client.put(f"/api/v1/users/{me['id']}/follow")
+        assert (await authenticated_client.get(url)).json()["total_likes"] == 1
+
+        response = await client.delete(f"/api/v1/users/{deleted['id']}")
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+
+        post = await session.get(Post, UUID(post_obj["id"]))
+        await session.refresh(post)
+        assert post.like_count == 0
+        assert post.comment_count == 0
+        await session.refresh(user)
+        assert user.follower_count == follower_count
+
+        result = (await authenticated_client.get(url)).json()
+        assert result["total_likes"] == 0
+        assert result["total_comments"] == 0
+
+    async def test_batch_get_success(self, authenticated_client, other_client):
+        me = (await authenticated_client.get("/api/v1/auth/me")).json()
+        other = (await other_client.get("/api/v1/auth/me")).json()
+        missing = "00000000-0000-0000-0000-000000000000"
+
+        response = await authenticated_client.post(
+            "/api/v1/users:batchGet", json={"ids": [other["id"], missing, me["id"]]}
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        result = response.json()
+        assert [u and u["username"] for u in result["users"]] == [
+            "otheruser",
+            None,
+            "testuser",
+        ]
+        assert result["missing"] == [missing]
+
+    async def test_batch_get_no_auth_fail(self, client):
+        response = await client.post(
+            "/api/v1/users:batchGet",
+            json={"ids": ["00000000-0000-0000-0000-000000000000"]},
+        )
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    async def test_search_prefix_success(self, authenticated_client):
+        response = await authenticated_client.get("/api/v1/users?search=test")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()[0]["username"] == "testuser"
+
+    async def test_search_fuzzy_success(self, authenticated_client):
+        response = await authenticated_client.get("/api/v1/users?search=tesuser")
+        assert response.status_code == status.HTTP_200_OK
+        assert "testuser" in [row["username"] for row in response.json()]
+
+    async def test_search_cursor_success(self, authenticated_client, other_client):
+        response = await authenticated_client.get(
+            "/api/v1/users", params={"search": "user", "limit": 1}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        first = response.json()
+
+        response = await authenticated_client.get(
+            "/api/v1/users",
+            params={
+                "search": "user",
+                "limit": 1,
+                "cursor": response.headers["x-next-cursor"],
+            },
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert {first[0]["username"], response.json()[0]["username"]} == {
+            "otheruser",
+            "testuser",
+        }
+
+    async def test_search_cursor_invalid_fail(self, authenticated_client):
+        response = await authenticated_client.get(
+            "/api/v1/users", params={"search": "user", "cursor": "invalid"}
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    async def test_autocomplete_success(self, authenticated_client, other_client):
+        response = await authenticated_client.get(
+            "/api/v1/users/autocomplete?prefix=oth"
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert [row["username"] for row in response.json()] == ["otheruser"]
+
+    async def test_autocomplete_trie_success(
+        self, authenticated_client, other_client, session, statements, monkeypatch
+    ):
+        monkeypatch.setattr(user_trie, "size", 100)
+        monkeypatch.setattr(user_trie, "root", None)
+        monkeypatch.setattr(user_trie, "removed", set())
+        await user_trie.load(session)
+        url = "/api/v1/users/autocomplete?prefix=oth&limit=1"
+
+        statements.clear()
+        response = await authenticated_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert [row["username"] for row in response.json()] == ["otheruser"]
+        assert statements == []
+
+        user_trie.discard(UUID(response.json()[0]["id"]))
+        response = await authenticated_client.get(url)
+        assert [row["username"] for row in response.json()] == ["otheruser"]
+        assert len(statements) == 1
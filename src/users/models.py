@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import TYPE_CHECKING
 from uuid import UUID, uuid7
 
-from sqlmodel import TIMESTAMP, Field, Relationship, SQLModel, func
+from sqlmodel import TIMESTAMP, Field, Index, Relationship, SQLModel, func
 
 from src.posts.models import Like
 
@@ -12,6 +12,19 @@ if TYPE_CHECKING:
 
 class User(SQLModel, table=True):
     __tablename__ = "users"
+    __table_args__ = (
+        Index(
+            "ix_users_username_pattern",
+            "username",
+            postgresql_ops={"username": "text_pattern_ops"},
+        ),
+        Index(
+            "ix_users_username_trgm",
+            "username",
+            postgresql_using="gin",
+            postgresql_ops={"username": "gin_trgm_ops"},
+        ),
+    )
 
     id: UUID = Field(
         default_factory=uuid7,
@@ -25,6 +38,8 @@ class User(SQLModel, table=True):
         sa_type=TIMESTAMP(timezone=True),  # ty: ignore
         sa_column_kwargs={"server_default": func.current_timestamp()},
     )
+    follower_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})
     posts: list["Post"] = Relationship(  # noqa: UP037
         back_populates="user",
         sa_relationship_kwargs={
@@ -1,36 +1,131 @@
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Query, status
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from pydantic import TypeAdapter
+from sqlalchemy import Uuid, any_, case
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import load_only
-from sqlmodel import select
+from sqlmodel import delete, desc, func, literal, or_, select, tuple_, update
 
 from src.config.auth import auth_dep
-from src.config.db import session_dep
+from src.config.cache import cache_dep
+from src.config.db import is_foreign_key_violation, session_dep
+from src.config.limits import limit_by_user
+from src.config.pagination import (
+    NEXT_CURSOR_HEADER,
+    decode_rank_cursor,
+    encode_rank_cursor,
+)
+from src.config.replicas import read_session_dep
+from src.config.responses import is_not_modified, make_etag, not_modified
+from src.config.settings import settings
+from src.posts import timeline
+from src.posts.models import Comment, Like, Post
 from src.users.models import Follow, User
-from src.users.schemas import UserRead, UserUpdate
+from src.users.schemas import UserBatchGet, UserBatchRead, UserRead, UserUpdate
+from src.users.trie import user_trie
 
 users_router = APIRouter(prefix="/api/v1/users", tags=["users"])
 
+user_adapter = TypeAdapter(tuple[UserRead, int])
+
+
+@users_router.post(":batchGet", response_model=UserBatchRead)
+async def batch_get_users(
+    payload: UserBatchGet, user_id: auth_dep, session: session_dep
+) -> UserBatchRead:
+    statement = select(User.id, User.username, User.created_at).where(
+        User.id == any_(literal(payload.ids, ARRAY(Uuid)))
+    )
+    result = await session.execute(statement)
+    rows = {row.id: UserRead.model_validate(row) for row in result.all()}
+
+    return UserBatchRead(
+        users=[rows.get(id) for id in payload.ids],
+        missing=list(dict.fromkeys(id for id in payload.ids if id not in rows)),
+    )
+
+
+@users_router.get("/autocomplete", response_model=list[UserRead])
+async def autocomplete(
+    user_id: auth_dep,
+    session: read_session_dep,
+    prefix: str = Query(min_length=1, max_length=64),
+    limit: int = Query(default=10, ge=1, le=20),
+) -> list[UserRead]:
+    prefix = prefix.strip().lower()
+    rows = user_trie.search(prefix, limit)
+
+    if rows is None or len(rows) < limit:
+        statement = (
+            select(User.id, User.username, User.created_at)
+            .where(User.username.startswith(prefix, autoescape=True))  # ty: ignore
+            .order_by(desc(User.follower_count), User.username)
+            .limit(limit)
+        )
+        result = await session.execute(statement)
+        rows = [UserRead.model_validate(row) for row in result.all()]
+
+    return rows
+
 
 @users_router.get("/{id}", response_model=UserRead)
 async def get_user(
     id: UUID,
     user_id: auth_dep,
     session: session_dep,
-) -> UserRead:
-    statement = select(User).where(User.id == id)
-    result = await session.execute(statement)
-    row = result.scalar()
+    cache: cache_dep,
+    request: Request,
+    response: Response,
+) -> UserRead | Response:
+    async def load() -> tuple[UserRead, int] | None:
+        statement = select(User.id, User.username, User.created_at, User.version).where(
+            User.id == id
+        )
+        result = await session.execute(statement)
+        row = result.first()
+        return (UserRead.model_validate(row), row.version) if row else None
 
-    if not row:
+    cached = await cache.fetch(
+        f"user:{id}", user_adapter, load, settings.CACHE_USER_TTL
+    )
+
+    if not cached:
         raise HTTPException(status.HTTP_404_NOT_FOUND)
 
-    return row  # ty: ignore
+    row, version = cached
+    headers = {
+        "ETag": make_etag(id, version),
+        "Cache-Control": f"public, max-age={settings.HTTP_USER_MAX_AGE}",
+    }
+
+    if is_not_modified(request, headers["ETag"]):
+        return not_modified(headers)
+
+    response.headers.update(headers)
+    return row
+
+
+async def authored_keys(session: AsyncSession, id: UUID) -> list[str]:
+    posts = await session.scalars(select(Post.id).where(Post.user_id == id))
+    commented = await session.scalars(
+        select(Comment.post_id).where(Comment.user_id == id).distinct()
+    )
+    return [
+        *(f"post:{post_id}" for post_id in posts),
+        *(f"comments:{post_id}" for post_id in commented),
+    ]
 
 
 @users_router.patch("/{id}", response_model=UserRead)
 async def update_user(
-    id: UUID, payload: UserUpdate, user_id: auth_dep, session: session_dep
+    id: UUID,
+    payload: UserUpdate,
+    user_id: auth_dep,
+    session: session_dep,
+    cache: cache_dep,
 ) -> UserRead:
     statement = select(User).where(User.id == id)
     result = await session.execute(statement)
@@ -42,18 +137,27 @@ async def update_user(
     if row.id != user_id:
         raise HTTPException(status.HTTP_403_FORBIDDEN)
 
+    renamed = payload.username is not None and payload.username != row.username
+
     for key, value in payload.model_dump(exclude_unset=True).items():
         if hasattr(row, key):
             setattr(row, key, value)
 
+    row.version = User.version + 1
     await session.commit()
     await session.refresh(row)
+    # cached posts and comment pages embed the author's username
+    keys = await authored_keys(session, id) if renamed else []
+    await cache.invalidate(f"user:{id}", *keys)
+    user_trie.discard(id)
 
     return row  # ty: ignore
 
 
 @users_router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_user(id: UUID, user_id: auth_dep, session: session_dep) -> None:
+async def delete_user(
+    id: UUID, user_id: auth_dep, session: session_dep, cache: cache_dep
+) -> None:
     statement = (
         select(User).where(User.id == id).options(load_only(User.id))  # ty: ignore
     )
@@ -66,52 +170,199 @@ async def delete_user(id: UUID, user_id: auth_dep, session: session_dep) -> None
     if row.id != user_id:
         raise HTTPException(status.HTTP_403_FORBIDDEN)
 
+    keys = await authored_keys(session, id)
+    liked = await release_counters(session, id)
+    result = await session.execute(
+        update(User)
+        .where(
+            User.id.in_(  # ty: ignore
+                select(Follow.following_id).where(Follow.follower_id == id)
+            )
+        )
+        .values(follower_count=User.follower_count - 1)
+        .returning(User.id, User.follower_count)  # ty: ignore
+        .execution_options(synchronize_session=False)
+    )
+    followed = result.all()
+
     await session.delete(row)
     await session.commit()
+    await cache.invalidate(
+        f"user:{id}", *keys, *(f"post:{post_id}" for post_id in liked)
+    )
+    user_trie.discard(id)
 
+    for following_id, follower_count in followed:
+        await unfollowed(following_id, follower_count)
 
-@users_router.post("/{id}/follow")
-async def follow(id: UUID, user_id: auth_dep, session: session_dep) -> dict[str, bool]:
+
+async def release_counters(session: AsyncSession, id: UUID) -> list[UUID]:
+    comments = (
+        select(Comment.post_id, func.count().label("total"))
+        .where(Comment.user_id == id)
+        .group_by(Comment.post_id)  # ty: ignore
+        .subquery()
+    )
+    await session.execute(
+        update(Post)
+        .where(Post.id == comments.c.post_id, Post.user_id != id)  # ty: ignore
+        .values(
+            comment_count=Post.comment_count - comments.c.total,
+            version=Post.version + 1,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    result = await session.execute(
+        update(Post)
+        .where(
+            Post.id.in_(select(Like.post_id).where(Like.user_id == id)),  # ty: ignore
+            Post.user_id != id,  # ty: ignore
+        )
+        .values(like_count=Post.like_count - 1, version=Post.version + 1)
+        .returning(Post.id)  # ty: ignore
+        .execution_options(synchronize_session=False)
+    )
+    return list(result.scalars().all())
+
+
+async def add_follow(session: AsyncSession, user_id: UUID, id: UUID) -> bool:
     if user_id == id:
         raise HTTPException(status.HTTP_400_BAD_REQUEST)
 
-    statement = select(select(User).where(User.id == id).exists())
-    result = await session.execute(statement)
-    row = result.scalar()
+    inserted = (
+        insert(Follow)
+        .values(follower_id=user_id, following_id=id)
+        .on_conflict_do_nothing()
+        .returning(Follow.following_id)  # ty: ignore
+        .cte("inserted")
+    )
+    statement = (
+        update(User)
+        .where(User.id.in_(select(inserted.c.following_id)))  # ty: ignore
+        .values(follower_count=User.follower_count + 1)
+        .returning(User.id)  # ty: ignore
+        .add_cte(inserted)
+        .execution_options(synchronize_session=False)
+    )
 
-    if not row:
-        raise HTTPException(status.HTTP_404_NOT_FOUND)
+    try:
+        result = await session.execute(statement)
+    except IntegrityError as e:
+        await session.rollback()
+        if is_foreign_key_violation(e):
+            raise HTTPException(status.HTTP_404_NOT_FOUND) from None
+        raise
+
+    if result.first() is None:
+        return False
+
+    await timeline.backfill(session, user_id, id)
+    return True
 
-    statement = select(Follow).where(
-        Follow.follower_id == user_id, Follow.following_id == id
+
+async def remove_follow(session: AsyncSession, user_id: UUID, id: UUID) -> int | None:
+    deleted = (
+        delete(Follow)
+        .where(Follow.follower_id == user_id, Follow.following_id == id)  # ty: ignore
+        .returning(Follow.following_id)  # ty: ignore
+        .cte("deleted")
+    )
+    statement = (
+        update(User)
+        .where(User.id.in_(select(deleted.c.following_id)))  # ty: ignore
+        .values(follower_count=User.follower_count - 1)
+        .returning(User.follower_count)  # ty: ignore
+        .add_cte(deleted)
+        .execution_options(synchronize_session=False)
     )
     result = await session.execute(statement)
-    row = result.scalar()
+    follower_count = result.scalar()
 
-    if row:
-        await session.delete(row)
-        following = False
-    else:
-        session.add(Follow(follower_id=user_id, following_id=id))
-        following = True
+    if follower_count is not None:
+        await timeline.remove(session, user_id, id)
+
+    return follower_count
 
-    await session.commit()
 
+async def unfollowed(id: UUID, follower_count: int | None) -> None:
+    if follower_count == settings.TIMELINE_FANOUT_LIMIT:
+        await timeline.timeline_jobs.schedule_backfill(id)
+
+
+@users_router.put("/{id}/follow", dependencies=[limit_by_user("write")])
+async def put_follow(
+    id: UUID, user_id: auth_dep, session: session_dep
+) -> dict[str, bool]:
+    if await add_follow(session, user_id, id):
+        await session.commit()
+
+    return {"following": True}
+
+
+@users_router.delete("/{id}/follow", dependencies=[limit_by_user("write")])
+async def delete_follow(
+    id: UUID, user_id: auth_dep, session: session_dep
+) -> dict[str, bool]:
+    follower_count = await remove_follow(session, user_id, id)
+    if follower_count is not None:
+        await session.commit()
+        await unfollowed(id, follower_count)
+
+    return {"following": False}
+
+
+@users_router.post("/{id}/follow", dependencies=[limit_by_user("write")])
+async def follow(id: UUID, user_id: auth_dep, session: session_dep) -> dict[str, bool]:
+    follower_count = await remove_follow(session, user_id, id)
+    following = follower_count is None
+    if following:
+        await add_follow(session, user_id, id)
+
+    await session.commit()
+    await unfollowed(id, follower_count)
     return {"following": following}
 
 
 @users_router.get("", response_model=list[UserRead])
 async def search(
     user_id: auth_dep,
-    session: session_dep,
+    session: read_session_dep,
+    response: Response,
     search: str = Query(min_length=1, max_length=64),
+    cursor: str | None = Query(default=None),
+    limit: int = Query(default=20, ge=1, le=100),
 ) -> list[UserRead]:
-    statement = (
-        select(User)
-        .where(User.username.startswith(search, autoescape=True))  # ty: ignore
-        .order_by(User.username)
-    ).limit(20)
+    search = search.strip().lower()
+    score = (
+        case(
+            (User.username.startswith(search, autoescape=True), 2),  # ty: ignore
+            (User.username.contains(search, autoescape=True), 1),  # ty: ignore
+            else_=0,
+        )
+        + func.similarity(User.username, search)
+    ).label("score")
+
+    statement = select(User.id, User.username, User.created_at, score).where(
+        or_(
+            User.username.contains(search, autoescape=True),  # ty: ignore
+            User.username.op("%")(search),  # ty: ignore
+        )
+    )
+
+    if cursor:
+        after, username = decode_rank_cursor(cursor)
+        statement = statement.where(
+            tuple_(-score, User.username) > tuple_(-after, username)
+        )
+
+    statement = statement.order_by(desc(score), User.username).limit(limit)
     result = await session.execute(statement)
-    rows = result.scalars().all()
+    rows = result.all()
+
+    if len(rows) == limit:
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_rank_cursor(
+            last.score, last.username
+        )
 
-    return rows  # ty: ignore
+    return [UserRead.model_validate(row) for row in rows]
@@ -3,7 +3,6 @@ from uuid import UUID
 
 from pydantic import EmailStr, SecretStr, field_validator
 from sqlmodel import Field, SQLModel
-from zxcvbn import zxcvbn
 
 
 class UserCreate(SQLModel):
@@ -21,15 +20,6 @@ class UserCreate(SQLModel):
     def validate_username(cls, value: str) -> str:
         return value.strip().lower()
 
-    @field_validator("password", mode="after")
-    @classmethod
-    def validate_password(cls, value: SecretStr) -> SecretStr:
-        payload = value.get_secret_value()
-        result = zxcvbn(payload)
-        if result["score"] < 3:
-            raise ValueError(" ".join(result["feedback"]["suggestions"]))
-        return value
-
 
 class UserRead(SQLModel):
     id: UUID
@@ -37,6 +27,15 @@ class UserRead(SQLModel):
     created_at: datetime
 
 
+class UserBatchGet(SQLModel):
+    ids: list[UUID] = Field(min_length=1, max_length=250)
+
+
+class UserBatchRead(SQLModel):
+    users: list[UserRead | None]
+    missing: list[UUID]
+
+
 class UserUpdate(SQLModel):
     email: EmailStr | None = Field(default=None, max_length=254)
     username: str | None = Field(default=None, max_length=64)
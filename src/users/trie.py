@@ -0,0 +1,95 @@
+import asyncio
+import logging
+from contextlib import suppress
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import desc, select
+
+from src.config.db import session
+from src.config.settings import settings
+from src.users.models import User
+from src.users.schemas import UserRead
+
+logger = logging.getLogger(__name__)
+
+
+class Node:
+    __slots__ = ("children", "users")
+
+    def __init__(self) -> None:
+        self.children: dict[str, Node] = {}
+        self.users: list[UserRead] = []
+
+
+class UserTrie:
+    def __init__(self, size: int, refresh: float, limit: int = 20) -> None:
+        self.size = size
+        self.refresh = refresh
+        self.limit = limit
+        self.root: Node | None = None
+        self.removed: set[UUID] = set()
+        self.task: asyncio.Task | None = None
+
+    def build(self, users: list[UserRead]) -> Node:
+        root = Node()
+
+        for user in users:
+            node = root
+            if len(node.users) < self.limit:
+                node.users.append(user)
+
+            for char in user.username:
+                node = node.children.setdefault(char, Node())
+                if len(node.users) < self.limit:
+                    node.users.append(user)
+
+        return root
+
+    def search(self, prefix: str, limit: int) -> list[UserRead] | None:
+        node = self.root
+        if node is None:
+            return None
+
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+
+        return [user for user in node.users if user.id not in self.removed][:limit]
+
+    def discard(self, id: UUID) -> None:
+        self.removed.add(id)
+
+    async def load(self, se: AsyncSession) -> None:
+        statement = (
+            select(User.id, User.username, User.created_at)
+            .order_by(desc(User.follower_count), User.username)
+            .limit(self.size)
+        )
+        result = await se.execute(statement)
+        self.root = self.build([UserRead.model_validate(row) for row in result.all()])
+        self.removed = set()
+
+    async def run(self) -> None:
+        while True:
+            try:
+                async with session() as se:
+                    await self.load(se)
+            except Exception:
+                logger.exception("user trie refresh failed")
+
+            await asyncio.sleep(self.refresh)
+
+    def start(self) -> None:
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self.task:
+            self.task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.task
+            self.task = None
+
+
+user_trie = UserTrie(settings.USER_TRIE_SIZE, settings.USER_TRIE_REFRESH)